@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2018 All rights reserved
+# This program and the accompanying materials
+# are made available under the terms of the Apache License, Version 2.0
+# which accompanies this distribution, and is available at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+
+"""
+Define a local content-addressed cache.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+
+def digest(path, chunk_size=1024 * 1024):
+    """Return the sha256 digest of a file read by chunks"""
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class Cache():
+    """Store files in a local directory indexed by keys
+
+    Every entry is a directory named by its key. The least recently used
+    entries are evicted as soon as the cache exceeds max_size bytes.
+    """
+
+    __logger = logging.getLogger(__name__)
+
+    def __init__(self, cache_dir, max_size):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    @staticmethod
+    def key(*items):
+        """Return the key addressing the items (which must be JSON)"""
+        return hashlib.sha256(json.dumps(
+            items, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return the directory of the entry or None if it's missing"""
+        path = os.path.join(self.cache_dir, key)
+        if not os.path.isdir(path):
+            self.__logger.debug("cache miss: %s", key)
+            return None
+        os.utime(path)
+        self.__logger.debug("cache hit: %s", key)
+        return path
+
+    def put(self, key, files):
+        """Store the files (a list of paths) as the entry key
+
+        The entry is fully written in a temporary directory before being
+        renamed to avoid replaying a partial entry.
+        """
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix='.')
+        try:
+            for path in files:
+                shutil.copy2(path, tmp_dir)
+            shutil.rmtree(os.path.join(self.cache_dir, key),
+                          ignore_errors=True)
+            os.rename(tmp_dir, os.path.join(self.cache_dir, key))
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        self.evict()
+
+    @staticmethod
+    def _size(path):
+        return sum(entry.stat().st_size for entry in os.scandir(path)
+                   if entry.is_file())
+
+    def evict(self):
+        """Remove the least recently used entries exceeding max_size"""
+        entries = sorted(
+            (entry for entry in os.scandir(self.cache_dir)
+             if entry.is_dir() and not entry.name.startswith('.')),
+            key=lambda entry: entry.stat().st_mtime, reverse=True)
+        size = 0
+        for entry in entries:
+            size += self._size(entry.path)
+            if size > self.max_size:
+                self.__logger.debug("cache eviction: %s", entry.name)
+                shutil.rmtree(entry.path, ignore_errors=True)
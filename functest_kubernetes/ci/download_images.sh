@@ -3,6 +3,12 @@
 set -e
 
 DIR="$(cd "$( dirname "${BASH_SOURCE[0]}" )" &> /dev/null && pwd)"
+# The images are pulled in parallel and loaded into kind in one batch
+# (see functest_kubernetes/ci/prepull.py)
+if command -v prepull_images &> /dev/null; then
+    exec prepull_images \
+        --images "$DIR/images.txt" --docker "sudo docker" --kind latest "$@"
+fi
 for i in $(cat $DIR/images.txt); do
     sudo docker pull $i
     # https://kind.sigs.k8s.io/docs/user/quick-start/
@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2018 All rights reserved
+# This program and the accompanying materials
+# are made available under the terms of the Apache License, Version 2.0
+# which accompanies this distribution, and is available at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+
+"""Pre-pull all images needed by the testcases
+
+The images are pulled concurrently by the local docker daemon and loaded
+in one batch into a kind cluster. On real clusters, a DaemonSet pulls
+them on every node.
+"""
+
+import argparse
+from concurrent import futures
+import json
+import logging
+import re
+import shlex
+import subprocess
+import sys
+import time
+
+from kubernetes import client
+from kubernetes import config
+import pkg_resources
+import prettytable
+
+from functest_kubernetes import informer
+from functest_kubernetes import pool
+
+pull_failures = ('ErrImagePull', 'ImagePullBackOff', 'InvalidImageName')
+pulled_re = re.compile(r'^Successfully pulled image "(.+?)" in ([\dhmsµu.]+)')
+duration_re = re.compile(r'([\d.]+)(h|ms|µs|us|m|s)')
+units = {'h': 3600, 'm': 60, 's': 1, 'ms': 1e-3, 'µs': 1e-6, 'us': 1e-6}
+
+
+def parse_duration(duration):
+    """Parse the Go durations (e.g. 1m2.5s) as printed in the events"""
+    return sum(float(value) * units[unit]
+               for value, unit in duration_re.findall(duration))
+
+
+def read_images(path):
+    """Return the images listed in path (one per line)"""
+    with open(path, encoding='utf-8') as file:
+        return [line.strip() for line in file
+                if line.strip() and not line.startswith('#')]
+
+
+class Docker():
+    """Pull the images via the local docker daemon"""
+
+    __logger = logging.getLogger(__name__)
+
+    def __init__(self, docker='docker'):
+        self.docker = shlex.split(docker)
+
+    def _run(self, *args):
+        return subprocess.check_output(
+            self.docker + list(args), stderr=subprocess.STDOUT).decode(
+                'utf-8').strip()
+
+    def local_digests(self, image):
+        """Return the digests of the image if present (or an empty set)"""
+        try:
+            repo_digests = json.loads(self._run(
+                'image', 'inspect', '--format', '{{json .RepoDigests}}',
+                image)) or []
+        except subprocess.CalledProcessError:
+            return set()
+        return {digest.split('@')[-1] for digest in repo_digests}
+
+    def remote_digest(self, image):
+        """Return the digest of the image in the registry (or None)"""
+        if '@' in image:
+            return image.split('@')[-1]
+        try:
+            return json.loads(self._run(
+                'buildx', 'imagetools', 'inspect', '--format',
+                '{{json .Manifest}}', image))['digest']
+        except (subprocess.CalledProcessError, ValueError, KeyError):
+            return None
+
+    def prepull(self, image):
+        """Pull the image unless the same digest is already present
+
+        It returns the image, its status and the duration.
+        """
+        start = time.time()
+        try:
+            digests = self.local_digests(image)
+            if digests and self.remote_digest(image) in digests:
+                return image, 'present', time.time() - start
+            self._run('pull', '-q', image)
+            return image, 'pulled', time.time() - start
+        except subprocess.CalledProcessError as exc:
+            self.__logger.error(
+                "Cannot pull %s:\n%s", image, exc.output.decode('utf-8'))
+            return image, 'failed', time.time() - start
+
+    def pull(self, images, jobs):
+        """Pull the images with at most jobs pulls in parallel"""
+        with futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+            return list(executor.map(self.prepull, images))
+
+    @staticmethod
+    def load(images, name):
+        """Load all images in the kind cluster name in one batch"""
+        # https://kind.sigs.k8s.io/docs/user/quick-start/
+        start = time.time()
+        subprocess.check_call(
+            ['kind', 'load', 'docker-image', '--name', name] + images)
+        return time.time() - start
+
+
+class DaemonSet():
+    """Pull the images on every node via a DaemonSet
+
+    The images may not ship any shell: an init container copies the
+    static busybox binary into a shared volume and every container sleeps
+    via this copy. The images are pulled as soon as the containers are
+    created. The pull durations are read from the events.
+    """
+
+    name = 'prepull'
+    timeout = 3600
+    tools_image = 'docker.io/library/busybox:1.28'
+    tools_dir = '/prepull'
+
+    def __init__(self):
+        config.load_kube_config()
+        self.corev1 = client.CoreV1Api()
+        self.appsv1 = client.AppsV1Api()
+        self.pool = pool.get_pool(
+            'prepull-', {"pod-security.kubernetes.io/enforce": "baseline"})
+        self.namespace = None
+
+    @staticmethod
+    def containers(images):
+        """Return the images indexed by container name"""
+        return {f'image-{index}': image for index, image in enumerate(images)}
+
+    def body(self, images):
+        """Return the DaemonSet pulling the images"""
+        labels = {'app': self.name}
+        busybox = f'{self.tools_dir}/busybox'
+        mounts = [client.V1VolumeMount(
+            name='tools', mount_path=self.tools_dir, read_only=True)]
+        return client.V1DaemonSet(
+            metadata=client.V1ObjectMeta(name=self.name),
+            spec=client.V1DaemonSetSpec(
+                selector=client.V1LabelSelector(match_labels=labels),
+                template=client.V1PodTemplateSpec(
+                    metadata=client.V1ObjectMeta(labels=labels),
+                    spec=client.V1PodSpec(
+                        tolerations=[client.V1Toleration(operator='Exists')],
+                        volumes=[client.V1Volume(
+                            name='tools',
+                            empty_dir=client.V1EmptyDirVolumeSource())],
+                        init_containers=[client.V1Container(
+                            name='tools', image=self.tools_image,
+                            command=['cp', '/bin/busybox', busybox],
+                            volume_mounts=[client.V1VolumeMount(
+                                name='tools', mount_path=self.tools_dir)],
+                            image_pull_policy='IfNotPresent')],
+                        containers=[
+                            client.V1Container(
+                                name=name, image=image,
+                                command=[busybox, 'sleep', '3600'],
+                                volume_mounts=mounts,
+                                image_pull_policy='IfNotPresent')
+                            for name, image in self.containers(
+                                images).items()]))))
+
+    @staticmethod
+    def done(pod):
+        """Check if all images of the pod are pulled or cannot be"""
+        statuses = pod.status.container_statuses or []
+        return len(statuses) == len(pod.spec.containers) and all(
+            status.image_id or (
+                status.state.waiting and
+                status.state.waiting.reason in pull_failures)
+            for status in statuses)
+
+    def durations(self):
+        """Return the pull durations per image (the slowest node)"""
+        durations = {}
+        for event in self.corev1.list_namespaced_event(
+                self.namespace, field_selector='reason=Pulled').items:
+            grp = pulled_re.match(event.message or '')
+            if grp:
+                duration = parse_duration(grp.group(2))
+                durations[grp.group(1)] = max(
+                    durations.get(grp.group(1), 0), duration)
+        return durations
+
+    def pull(self, images):
+        """Pull the images on all nodes and return the results"""
+        self.namespace = self.pool.acquire()
+        pods = informer.Informer(
+            self.corev1.list_namespaced_pod, self.namespace,
+            label_selector=f'app={self.name}').start()
+        try:
+            self.appsv1.create_namespaced_daemon_set(
+                self.namespace, self.body(images))
+            nodes = len(self.corev1.list_node().items)
+            pods.wait(lambda _: sum(map(
+                self.done, pods.cache.values())) >= nodes, self.timeout)
+            containers = self.containers(images)
+            failed = set()
+            for pod in pods.cache.values():
+                for status in pod.status.container_statuses or []:
+                    if not status.image_id:
+                        failed.add(containers[status.name])
+            durations = self.durations()
+        finally:
+            pods.stop()
+            self.pool.release(self.namespace)
+        return [
+            (image, 'failed' if image in failed else (
+                'pulled' if image in durations else 'present'),
+             durations.get(image, 0))
+            for image in images]
+
+
+def report(results):
+    """Return the table of the per-image timings"""
+    msg = prettytable.PrettyTable(
+        header_style='upper', padding_width=5,
+        field_names=['image', 'status', 'duration'])
+    for image, status, duration in sorted(
+            results, key=lambda result: result[2], reverse=True):
+        msg.add_row([image, status, f'{duration:0.2f}'])
+    return msg.get_string()
+
+
+def main(args=None):
+    """Pre-pull the images and report the per-image timings"""
+    logging.basicConfig(level=logging.INFO)
+    logger = logging.getLogger(__name__)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--images', default=pkg_resources.resource_filename(
+            'functest_kubernetes', 'ci/images.txt'),
+        help='the file listing the images')
+    parser.add_argument(
+        '--jobs', type=int, default=8, help='the maximum parallel pulls')
+    parser.add_argument(
+        '--docker', default='docker', help='the docker command')
+    parser.add_argument(
+        '--kind', metavar='NAME',
+        help='load the images into the kind cluster NAME')
+    parser.add_argument(
+        '--daemonset', action='store_true',
+        help='pull the images on all nodes via a DaemonSet')
+    parser.add_argument(
+        '--output', help='write the results as JSON in this file')
+    args = parser.parse_args(args)
+    images = read_images(args.images)
+    start = time.time()
+    if args.daemonset:
+        results = DaemonSet().pull(images)
+    else:
+        results = Docker(args.docker).pull(images, args.jobs)
+        if args.kind:
+            duration = Docker.load(
+                [image for image, status, _ in results
+                 if status != 'failed'], args.kind)
+            logger.info("Images loaded into kind in %0.2f sec", duration)
+    logger.info(
+        "%d images pre-pulled in %0.2f sec\n\n%s\n", len(images),
+        time.time() - start, report(results))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump([
+                {'image': image, 'status': status, 'duration': duration}
+                for image, status, duration in results], file, indent=2)
+    return int(any(status == 'failed' for _, status, _ in results))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2018 All rights reserved
+# This program and the accompanying materials
+# are made available under the terms of the Apache License, Version 2.0
+# which accompanies this distribution, and is available at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+
+"""Define the classes required to fully cover prepull."""
+
+import logging
+import subprocess
+import unittest
+
+import mock
+
+from functest_kubernetes.ci import prepull
+
+
+class ParseTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    def test_parse_duration(self):
+        self.assertEqual(prepull.parse_duration('1.5s'), 1.5)
+        self.assertEqual(prepull.parse_duration('250ms'), 0.25)
+        self.assertEqual(prepull.parse_duration('1m2.5s'), 62.5)
+
+    def test_read_images(self):
+        with mock.patch('builtins.open', mock.mock_open(
+                read_data='docker.io/a:1\n\n# comment\nquay.io/b:2\n')):
+            self.assertEqual(
+                prepull.read_images('images.txt'),
+                ['docker.io/a:1', 'quay.io/b:2'])
+
+    def test_images(self):
+        images = prepull.read_images(prepull.pkg_resources.resource_filename(
+            'functest_kubernetes', 'ci/images.txt'))
+        self.assertIn('docker.io/library/busybox:1.28', images)
+
+
+class DockerTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    def setUp(self):
+        self.docker = prepull.Docker('sudo docker')
+
+    @mock.patch('subprocess.check_output', return_value=b'ok')
+    def test_run(self, *args):
+        # pylint: disable=protected-access
+        self.assertEqual(self.docker._run('pull', 'a'), 'ok')
+        args[0].assert_called_once_with(
+            ['sudo', 'docker', 'pull', 'a'], stderr=subprocess.STDOUT)
+
+    def test_present(self):
+        with mock.patch.object(self.docker, '_run', side_effect=[
+                '["docker.io/a@sha256:1"]', '{"digest": "sha256:1"}']) as run:
+            self.assertEqual(
+                self.docker.prepull('a:1')[:2], ('a:1', 'present'))
+        self.assertEqual(run.call_count, 2)
+
+    def test_pinned(self):
+        with mock.patch.object(self.docker, '_run', side_effect=[
+                '["docker.io/a@sha256:1"]']) as run:
+            self.assertEqual(
+                self.docker.prepull('a@sha256:1')[1], 'present')
+        run.assert_called_once()
+
+    def test_outdated(self):
+        with mock.patch.object(self.docker, '_run', side_effect=[
+                '["docker.io/a@sha256:1"]', '{"digest": "sha256:2"}',
+                '']) as run:
+            self.assertEqual(self.docker.prepull('a:1')[1], 'pulled')
+        run.assert_called_with('pull', '-q', 'a:1')
+
+    def test_missing(self):
+        with mock.patch.object(self.docker, '_run', side_effect=[
+                subprocess.CalledProcessError(1, 'docker'), '']) as run:
+            self.assertEqual(self.docker.prepull('a:1')[1], 'pulled')
+        self.assertEqual(run.call_count, 2)
+
+    def test_failed(self):
+        with mock.patch.object(self.docker, '_run', side_effect=[
+                subprocess.CalledProcessError(1, 'docker'),
+                subprocess.CalledProcessError(1, 'docker', output=b'')]):
+            self.assertEqual(self.docker.prepull('a:1')[1], 'failed')
+
+    @mock.patch('functest_kubernetes.ci.prepull.Docker.prepull',
+                side_effect=lambda image: (image, 'pulled', 1))
+    def test_pull(self, *args):
+        self.assertEqual(
+            self.docker.pull(['a', 'b'], 2),
+            [('a', 'pulled', 1), ('b', 'pulled', 1)])
+        self.assertEqual(args[0].call_count, 2)
+
+
+class DaemonSetTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    @mock.patch('functest_kubernetes.pool.get_pool')
+    @mock.patch('kubernetes.config.load_kube_config')
+    def setUp(self, *args):
+        self.daemonset = prepull.DaemonSet()
+        self.daemonset.corev1 = mock.Mock()
+        self.daemonset.appsv1 = mock.Mock()
+        args[0].assert_called_once_with()
+
+    def test_body(self):
+        spec = self.daemonset.body(['a:1', 'b:2']).spec.template.spec
+        self.assertEqual(
+            spec.init_containers[0].image, 'docker.io/library/busybox:1.28')
+        self.assertEqual(
+            [(container.name, container.image, container.command)
+             for container in spec.containers], [
+                 ('image-0', 'a:1', ['/prepull/busybox', 'sleep', '3600']),
+                 ('image-1', 'b:2', ['/prepull/busybox', 'sleep', '3600'])])
+
+    @mock.patch('functest_kubernetes.ci.prepull.informer.Informer')
+    def test_pull(self, *args):
+        pod = mock.Mock()
+        pod.status.container_statuses = [
+            mock.Mock(image_id='', image='docker.io/library/b:2'),
+            mock.Mock(image_id='sha256:1', image='docker.io/library/a:1')]
+        pod.status.container_statuses[0].name = 'image-1'
+        pod.status.container_statuses[1].name = 'image-0'
+        args[0].return_value.start.return_value.cache = {'pod': pod}
+        self.daemonset.corev1.list_node.return_value.items = [mock.Mock()]
+        self.daemonset.corev1.list_namespaced_event.return_value.items = [
+            mock.Mock(message='Successfully pulled image "a:1" in 2.5s')]
+        self.assertEqual(self.daemonset.pull(['a:1', 'b:2', 'c:3']), [
+            ('a:1', 'pulled', 2.5), ('b:2', 'failed', 0),
+            ('c:3', 'present', 0)])
+        self.daemonset.pool.release.assert_called_once_with(
+            self.daemonset.pool.acquire.return_value)
+
+    def test_done(self):
+        pod = mock.Mock()
+        pod.spec.containers = [mock.Mock(), mock.Mock()]
+        pulled = mock.Mock(image_id='sha256:1')
+        failed = mock.Mock(image_id='')
+        failed.state.waiting.reason = 'ImagePullBackOff'
+        pod.status.container_statuses = [pulled]
+        self.assertFalse(prepull.DaemonSet.done(pod))
+        pod.status.container_statuses = [pulled, failed]
+        self.assertTrue(prepull.DaemonSet.done(pod))
+        failed.state.waiting.reason = 'ContainerCreating'
+        self.assertFalse(prepull.DaemonSet.done(pod))
+
+
+class MainTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    @mock.patch('functest_kubernetes.ci.prepull.Docker.load', return_value=1)
+    @mock.patch('functest_kubernetes.ci.prepull.Docker.pull',
+                return_value=[('a', 'pulled', 1), ('b', 'failed', 1)])
+    @mock.patch('functest_kubernetes.ci.prepull.read_images',
+                return_value=['a', 'b'])
+    def test_kind(self, *args):
+        self.assertEqual(prepull.main(
+            ['--images', 'images.txt', '--kind', 'latest', '--jobs', '4']), 1)
+        args[0].assert_called_once_with('images.txt')
+        args[1].assert_called_once_with(['a', 'b'], 4)
+        args[2].assert_called_once_with(['a'], 'latest')
+
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    unittest.main(verbosity=2)
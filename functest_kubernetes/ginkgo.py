@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2018 All rights reserved
+# This program and the accompanying materials
+# are made available under the terms of the Apache License, Version 2.0
+# which accompanies this distribution, and is available at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+
+"""
+Define the helpers parsing ginkgo outputs.
+"""
+
+import bisect
+import codecs
+import collections
+import glob
+import heapq
+import os
+import re
+import time
+from xml.etree import ElementTree
+
+
+class OutputParser():
+    # pylint: disable=too-many-instance-attributes
+    """Parse the ginkgo output as it arrives
+
+    It only keeps the overall result, the failure summary, the last lines
+    and the progress counters in memory whatever the size of the output.
+    """
+
+    summary_re = re.compile(
+        r'^(FAIL|SUCCESS)!.* ([0-9]+) Passed \| ([0-9]+) Failed \|'
+        r' ([0-9]+) Pending \| ([0-9]+) Skipped')
+    failures_re = re.compile(r'^Summarizing [0-9]+ Failure')
+    will_run_re = re.compile(r'^Will run ([0-9]+) of ([0-9]+) specs')
+    failed_re = re.compile(r'^• \[(FAILED|PANICKED|TIMEDOUT|INTERRUPTED)\]')
+    max_failure_lines = 2000
+    max_tail_lines = 50
+    max_line_length = 65536
+
+    def __init__(self):
+        self.summary = None
+        self.failures = collections.deque(maxlen=self.max_failure_lines)
+        self.tail = collections.deque(maxlen=self.max_tail_lines)
+        self.total = 0
+        self.done = 0
+        self.failed = 0
+        self.started = self.updated = time.time()
+        self.stalled = False
+        self._in_failures = False
+        self._decoder = codecs.getincrementaldecoder('utf-8')(
+            errors='ignore')
+        self._line = ''
+
+    def feed(self, data):
+        """Parse the next chunk of the ginkgo output
+
+        The chunk may be bytes or str and may end in the middle of a line.
+        Every spec which has run prints one bullet.
+        """
+        if isinstance(data, bytes):
+            data = self._decoder.decode(data)
+        self.updated = time.time()
+        self.done += data.count('•')
+        lines = (self._line + data).split('\n')
+        self._line = lines.pop()[-self.max_line_length:]
+        for line in lines:
+            self._parse_line(line)
+
+    def close(self):
+        """Parse the last line if it's not ended by a newline"""
+        if self._line:
+            self._parse_line(self._line)
+            self._line = ''
+
+    def _parse_line(self, line):
+        line = line.rstrip('\r')
+        self.tail.append(line)
+        if self._in_failures:
+            if line.startswith('Ran'):
+                self._in_failures = False
+            else:
+                self.failures.append(line)
+            return
+        if self.failures_re.match(line):
+            self._in_failures = True
+            self.failures.clear()
+            self.failures.append(line)
+            return
+        if self.failed_re.match(line):
+            self.failed += 1
+            return
+        grp = self.will_run_re.match(line)
+        if grp:
+            self.total = int(grp.group(1))
+            return
+        grp = self.summary_re.match(line)
+        if grp:
+            self.summary = {
+                'status': grp.group(1),
+                'passed': int(grp.group(2)),
+                'failed': int(grp.group(3)),
+                'pending': int(grp.group(4)),
+                'skipped': int(grp.group(5))}
+
+
+class SpecResults():
+    """Store the per-spec results in a compact form
+
+    The specs are indexed by name and map to [state, duration]. The skipped
+    specs are only counted as they are the vast majority of any focused run.
+    """
+
+    failed_states = ('failed', 'panicked', 'interrupted', 'timedout',
+                     'aborted')
+
+    def __init__(self, specs=None):
+        self.specs = dict(specs or {})
+        self.skipped = 0
+
+    def __len__(self):
+        return len(self.specs)
+
+    def add(self, name, state, duration):
+        """Add the result of a spec"""
+        if state == 'skipped':
+            self.skipped += 1
+        else:
+            self.specs[name] = [state, duration]
+
+    def update(self, other):
+        """Merge the results of another run"""
+        self.specs.update(other.specs)
+        self.skipped += other.skipped
+
+    def by_state(self, *states):
+        """Return the names of the specs in the given states"""
+        return [name for name, (state, _) in self.specs.items()
+                if state in states]
+
+    def failed(self):
+        """Return the names of the failed specs"""
+        return self.by_state(*self.failed_states)
+
+    def durations(self):
+        """Return the durations of the specs which were run"""
+        return {name: duration for name, (state, duration)
+                in self.specs.items() if state != 'pending'}
+
+    def counters(self):
+        """Return the counters as printed by ginkgo"""
+        failed = len(self.failed())
+        return {
+            'status': 'FAIL' if failed else 'SUCCESS',
+            'passed': len(self.by_state('passed')),
+            'failed': failed,
+            'pending': len(self.by_state('pending')),
+            'skipped': self.skipped}
+
+
+_leaf_re = re.compile(
+    r'^\[(It|BeforeSuite|AfterSuite|SynchronizedBeforeSuite|'
+    r'SynchronizedAfterSuite|ReportBeforeSuite|ReportAfterSuite|'
+    r'DeferCleanup \(Suite\))\] ?')
+
+
+def _testcase_state(elem):
+    if elem.get('status'):
+        return elem.get('status')
+    if elem.find('failure') is not None or elem.find('error') is not None:
+        return 'failed'
+    if elem.find('skipped') is not None:
+        return 'skipped'
+    return 'passed'
+
+
+def parse_junit(path, results=None):
+    """Parse a JUnit report written by ginkgo
+
+    The report is parsed incrementally and every testcase element is freed
+    as soon as it has been read.
+    """
+    if results is None:
+        results = SpecResults()
+    parents = []
+    for event, elem in ElementTree.iterparse(  # nosec B314
+            path, events=('start', 'end')):
+        if event == 'start':
+            parents.append(elem)
+            continue
+        parents.pop()
+        if elem.tag != 'testcase':
+            continue
+        name = elem.get('name', '')
+        grp = _leaf_re.match(name)
+        if not grp or grp.group(1) == 'It':
+            results.add(
+                name[grp.end():] if grp else name, _testcase_state(elem),
+                float(elem.get('time', 0)))
+        elem.clear()
+        if parents:
+            parents[-1].remove(elem)
+    return results
+
+
+def junit_reports(report_dir):
+    """Return the JUnit reports written in report_dir"""
+    return sorted(glob.glob(os.path.join(report_dir, 'junit*.xml')))
+
+
+def parse_reports(report_dir):
+    """Parse all JUnit reports written in report_dir"""
+    results = SpecResults()
+    for path in junit_reports(report_dir):
+        parse_junit(path, results)
+    return results
+
+
+_sig_re = re.compile(r'\[(sig-[\w-]+)\]')
+
+
+def sig(name):
+    """Return the SIG owning the spec"""
+    grp = _sig_re.search(name)
+    return grp.group(1) if grp else 'unknown'
+
+
+def histogram(durations, buckets):
+    """Count the spec durations per SIG and per bucket
+
+    A spec falls into the first bucket greater than its duration. The last
+    counter is for the specs longer than all buckets.
+    """
+    hist = {}
+    for name, duration in durations.items():
+        counters = hist.setdefault(sig(name), [0] * (len(buckets) + 1))
+        counters[bisect.bisect_right(buckets, duration)] += 1
+    return hist
+
+
+def regressions(durations, baseline, factor, minimum=0):
+    """Return the specs which are slower than in the baseline
+
+    It only considers the specs which take at least minimum seconds more
+    than in the baseline to skip the noise of the fastest ones.
+    """
+    return {
+        name: [baseline[name], duration]
+        for name, duration in durations.items()
+        if name in baseline and duration > baseline[name] * factor and
+        duration - baseline[name] >= minimum}
+
+
+def escape(text):
+    """Escape all the characters special for Go regular expressions"""
+    return re.sub(r'([\\.+*?()|\[\]{}^$])', r'\\\1', text)
+
+
+def focus(names, suite=None):
+    """Return the regular expression matching exactly the specs
+
+    ginkgo matches the filters against the suite description followed by
+    the spec text (the names read in the reports don't include it). The
+    description is optional for the names to be selected locally too.
+    """
+    prefix = f'(?:{escape(suite)} )?' if suite else ''
+    return (f'^{prefix}(?:' + '|'.join(escape(name) for name in names) +
+            ')$')
+
+
+def select(names, include=None, exclude=None):
+    """Return the names matching include and not matching exclude
+
+    It mimics the ginkgo focus and skip filters.
+    """
+    include_re = re.compile(include) if include else None
+    exclude_re = re.compile(exclude) if exclude else None
+    return [name for name in names
+            if (not include_re or include_re.search(name)) and
+            (not exclude_re or not exclude_re.search(name))]
+
+
+def balance(durations, count):
+    """Split the specs in at most count shards of similar durations
+
+    It implements the longest processing time first algorithm.
+    """
+    shards = [(0, index, []) for index in range(count)]
+    for name in sorted(durations, key=durations.get, reverse=True):
+        load, index, names = heapq.heappop(shards)
+        names.append(name)
+        heapq.heappush(shards, (load + durations[name], index, names))
+    return [names for _, _, names in sorted(
+        shards, key=lambda shard: shard[1]) if names]
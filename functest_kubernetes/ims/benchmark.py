@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2018 All rights reserved
+# This program and the accompanying materials
+# are made available under the terms of the Apache License, Version 2.0
+# which accompanies this distribution, and is available at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+
+"""Compare the vIMS deployments via Helm and via the Kubernetes API"""
+
+import collections
+import contextlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+from kubernetes import client
+from kubernetes import config
+import prettytable
+from xtesting.core import testcase
+
+from functest_kubernetes import pool
+from functest_kubernetes.ims import ims
+
+
+@contextlib.contextmanager
+def count_requests():
+    """Count the requests sent by the Kubernetes clients of this process
+
+    It yields a Counter indexed by HTTP method. It's process-wide: the
+    requests of any other thread (e.g. the namespace reaper) are counted
+    too.
+    """
+    counter = collections.Counter()
+    lock = threading.Lock()
+    request = client.rest.RESTClientObject.request
+
+    def counted_request(obj, method, *args, **kwargs):
+        with lock:
+            counter[method] += 1
+        return request(obj, method, *args, **kwargs)
+
+    client.rest.RESTClientObject.request = counted_request
+    try:
+        yield counter
+    finally:
+        client.rest.RESTClientObject.request = request
+
+
+@contextlib.contextmanager
+def disable_prefill():
+    """Don't create spare namespaces in the background
+
+    Else they would be created (and counted) while the deployments are
+    measured.
+    """
+    size = pool.Pool.size
+    pool.Pool.size = 0
+    try:
+        yield
+    finally:
+        pool.Pool.size = size
+
+
+class VimsBenchmark(testcase.TestCase):
+    """Deploy vIMS via Helm and via the API several times and compare
+
+    Every deployment records the submit time, the time until all
+    deployments are ready, the API requests sent by this process and by
+    all clients, and the teardown time (until the namespace is
+    finalized). The time spent in clean is kept per run but it isn't
+    compared: helm uninstalls synchronously whereas K8sVims only hands
+    the namespace over to the reaper. The runs of both paths are
+    interleaved to share the cluster drifts.
+    """
+
+    __logger = logging.getLogger(__name__)
+
+    iterations = 3
+    drivers = {'k8s': ims.K8sVims, 'helm': ims.HelmVims}
+    metrics = (
+        'submit', 'ready', 'teardown', 'process_requests',
+        'apiserver_requests')
+    teardown_timeout = 600
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        config.load_kube_config()
+        self.corev1 = client.CoreV1Api()
+        self.output_log_name = 'functest-kubernetes.log'
+        self.output_debug_log_name = 'functest-kubernetes.debug.log'
+
+    def check_requirements(self):
+        """Check if helm is in $PATH"""
+        self.is_skipped = not shutil.which("helm")
+        if self.is_skipped:
+            self.__logger.warning("helm is missing")
+
+    def apiserver_requests(self):
+        """Return the requests served by kube-apiserver (or None)
+
+        It sums apiserver_request_total from the metrics endpoint. It
+        includes the requests of all clients (e.g. helm and the
+        controllers).
+        """
+        try:
+            api_response = self.corev1.api_client.call_api(
+                '/metrics', 'GET', auth_settings=['BearerToken'],
+                _return_http_data_only=True, _preload_content=False)
+        except client.rest.ApiException as exc:
+            self.__logger.debug("Cannot read the metrics: %s", exc.reason)
+            return None
+        total = 0
+        try:
+            for line in api_response:
+                if line.startswith(b'apiserver_request_total{'):
+                    total += float(line.rsplit(b' ', 1)[1])
+        finally:
+            api_response.release_conn()
+        return int(total)
+
+    def wait_deleted(self, namespace, start):
+        """Return when the namespace is finalized (or None)"""
+        while time.time() - start < self.teardown_timeout:
+            try:
+                self.corev1.read_namespace(namespace)
+            except client.rest.ApiException as exc:
+                if exc.status == 404:
+                    return time.time() - start
+            time.sleep(1)
+        return None
+
+    def deploy(self, name, iteration):
+        """Deploy, wait and clean vIMS once via the driver name"""
+        driver = self.drivers[name](
+            case_name=f'{self.case_name}_{name}_{iteration}',
+            project_name=self.project_name)
+        result = {'driver': name, 'iteration': iteration, 'ready': None}
+        apiserver_requests = self.apiserver_requests()
+        with count_requests() as counter:
+            driver.start_time = time.time()
+            try:
+                driver.prepare_vnf()
+                start = time.time()
+                driver.deploy_vnf()
+                result['submit'] = time.time() - start
+                if driver.wait_vnf():
+                    result['ready'] = time.time() - start
+            except (client.rest.ApiException,
+                    subprocess.CalledProcessError):
+                self.__logger.exception("Cannot deploy vIMS via %s", name)
+            start = time.time()
+            try:
+                driver.clean()
+            except (client.rest.ApiException,
+                    subprocess.CalledProcessError):
+                self.__logger.exception("Cannot clean vIMS via %s", name)
+            result['clean'] = time.time() - start
+        result['process_requests'] = sum(counter.values())
+        if apiserver_requests is not None:
+            served = self.apiserver_requests()
+            if served is not None:
+                result['apiserver_requests'] = served - apiserver_requests
+        if driver.namespace:
+            result['teardown'] = self.wait_deleted(driver.namespace, start)
+        self.__logger.info(
+            "vIMS deployed via %s (%d): %s", name, iteration, result)
+        return result
+
+    def summarize(self, runs):
+        """Return the mean, min and max of every metric per driver"""
+        summary = {}
+        for name in self.drivers:
+            summary[name] = {'runs': 0, 'failures': 0}
+            for run in runs:
+                if run['driver'] == name:
+                    summary[name]['runs'] += 1
+                    summary[name]['failures'] += run['ready'] is None
+            for metric in self.metrics:
+                values = [
+                    run[metric] for run in runs if run['driver'] == name and
+                    run.get(metric) is not None]
+                if values:
+                    summary[name][metric] = {
+                        'mean': sum(values) / len(values),
+                        'min': min(values), 'max': max(values)}
+        return summary
+
+    def report(self, summary):
+        """Return the comparison table"""
+        msg = prettytable.PrettyTable(
+            header_style='upper', padding_width=5,
+            field_names=['metric'] + list(self.drivers))
+        msg.add_row(['runs'] + [
+            f"{summary[name]['runs']} ({summary[name]['failures']} failed)"
+            for name in self.drivers])
+        for metric in self.metrics:
+            msg.add_row([metric] + [
+                '-' if metric not in summary[name] else (
+                    f"{summary[name][metric]['mean']:0.2f} "
+                    f"[{summary[name][metric]['min']:0.2f}-"
+                    f"{summary[name][metric]['max']:0.2f}]")
+                for name in self.drivers])
+        return msg.get_string()
+
+    def run(self, **kwargs):
+        self.start_time = time.time()
+        runs = []
+        with disable_prefill():
+            for iteration in range(
+                    kwargs.get('iterations', self.iterations)):
+                for name in self.drivers:
+                    runs.append(self.deploy(name, iteration))
+        self.details['runs'] = runs
+        self.details['summary'] = self.summarize(runs)
+        if not os.path.exists(self.res_dir):
+            os.makedirs(self.res_dir)
+        with open(os.path.join(self.res_dir, 'benchmark.json'), 'w',
+                  encoding='utf-8') as file:
+            json.dump(self.details, file, indent=2)
+        self.__logger.info(
+            "Deployment paths (mean [min-max], sec):\n\n%s\n",
+            self.report(self.details['summary']))
+        if runs and all(run['ready'] is not None for run in runs):
+            self.result = 100
+        self.stop_time = time.time()
@@ -12,20 +12,112 @@
 from __future__ import division
 
 import abc
+import codecs
+import collections
+from concurrent import futures
+import datetime
+import json
 import logging
+import math
 import os
 import re
 import subprocess
+import threading
 import time
-import yaml
 
-from jinja2 import Template
 from kubernetes import client
 from kubernetes import config
-from kubernetes import watch
 import pkg_resources
+import prettytable
 from xtesting.core import testcase
 
+from functest_kubernetes import informer
+from functest_kubernetes import manifest
+from functest_kubernetes import pool
+
+
+def percentile(values, percent):
+    """Return the nearest-rank percentile of the sorted values"""
+    if not values:
+        return None
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+def parse_timestamp(timestamp):
+    """Parse the RFC 3339 timestamps (in UTC) prefixing the pod logs"""
+    date, _, fraction = timestamp.rstrip('Z').partition('.')
+    return datetime.datetime.strptime(date, '%Y-%m-%dT%H:%M:%S').replace(
+        tzinfo=datetime.timezone.utc).timestamp() + float(f'0.{fraction}')
+
+
+class LiveTestParser():
+    """Parse the clearwater-live-test output as it arrives
+
+    It only keeps the status of every test case, the summary and the last
+    lines in memory. If the log lines are prefixed by their timestamps,
+    the duration of every test case is measured from the previous one (or
+    from the start of the rake task).
+    """
+
+    test_re = re.compile(
+        r'^(.+?) - (?:\([\d, ]*\) )?(Passed|Failed|Skipped)\b')
+    failures_re = re.compile(r'^(\d+) failures out of (\d+) tests run')
+    skipped_re = re.compile(r'^(\d+) tests skipped')
+    execute_re = re.compile(r'^\*\* Execute test\b')
+    max_tail_lines = 50
+
+    def __init__(self, timestamps=False):
+        self.timestamps = timestamps
+        self.tests = {}
+        self.summary = {}
+        self.tail = collections.deque(maxlen=self.max_tail_lines)
+        self._decoder = codecs.getincrementaldecoder('utf-8')(
+            errors='ignore')
+        self._line = ''
+        self._last = None
+
+    def feed(self, data):
+        """Parse the next chunk and return the test cases completed"""
+        lines = (self._line + self._decoder.decode(data)).split('\n')
+        self._line = lines.pop()
+        return [test for test in map(self._parse_line, lines) if test]
+
+    def close(self):
+        """Parse the last line if it's not ended by a newline"""
+        line, self._line = self._line, ''
+        return [test for test in [self._parse_line(line)] if test]
+
+    def _parse_line(self, line):
+        line = line.rstrip('\r')
+        now = None
+        if self.timestamps and line:
+            timestamp, _, line = line.partition(' ')
+            try:
+                now = parse_timestamp(timestamp)
+            except ValueError:
+                now = None
+        self.tail.append(line)
+        if self.execute_re.match(line):
+            self._last = now
+            return None
+        grp = self.test_re.match(line)
+        if grp:
+            self.tests[grp.group(1)] = grp.group(2)
+            duration = (
+                now - self._last if now is not None and
+                self._last is not None else None)
+            self._last = now
+            return grp.group(1), grp.group(2), duration
+        grp = self.failures_re.match(line)
+        if grp:
+            self.summary['failures'] = int(grp.group(1))
+            self.summary['total'] = int(grp.group(2))
+            return None
+        grp = self.skipped_re.match(line)
+        if grp and self.summary:
+            self.summary['skipped'] = int(grp.group(1))
+        return None
+
 
 class Vims(testcase.TestCase):  # pylint: disable=too-many-instance-attributes
     """Deploy and test Clearwater vIMS using Kubernetes
@@ -39,6 +131,20 @@ class Vims(testcase.TestCase):  # pylint: disable=too-many-instance-attributes
     metadata_name = "env-vars"
     test_image_name = "ollivier/clearwater-live-test:hunter"
     test_container_name = "live-test"
+    probe_image_name = "library/busybox:1.28"
+    probe_container_name = "readiness-probe"
+    readiness_timeout = 120
+    readiness_services = {"bono": [5060], "ellis": [80], "sprout": [5052]}
+    timeline_phases = (
+        'submission', 'scheduling', 'initialization', 'image pull',
+        'start', 'readiness')
+    load_container_name = "sip-load"
+    load_duration = 300
+    load_threshold = 1
+    load_tests = "Basic*"
+    load_test_durations = {
+        'registration_test': 'Registration', 'call_test': 'Basic Call'}
+    load_percentiles = (50, 95, 99)
     ns_generate_name = "ims-"
     dockerhub_repo = os.getenv("MIRROR_REPO", "docker.io")
     quay_repo = os.getenv("MIRROR_REPO", "quay.io")
@@ -58,29 +164,34 @@ class Vims(testcase.TestCase):  # pylint: disable=too-many-instance-attributes
         self.output_debug_log_name = 'functest-kubernetes.debug.log'
         self.namespace = ""
         self.zone = ""
+        self.deployments = None
+        self.pods = None
+        self.endpoints = None
+        self.pool = None
 
     def prepare_vnf(self):
         """Prepare vIMS as proposed by clearwater-live-test
 
-        It creates a dedicated namespace and the configmap needed.
+        It acquires a dedicated namespace including the configmap needed
+        from the pool. It also starts watching the deployments, the pods
+        and the endpoints of the namespace once for all waits.
 
         See https://github.com/Metaswitch/clearwater-live-test for more details
         """
-        api_response = self.corev1.create_namespace(
-            client.V1Namespace(metadata=client.V1ObjectMeta(
-                generate_name=self.ns_generate_name,
-                labels={"pod-security.kubernetes.io/enforce": "baseline"})))
-        self.namespace = api_response.metadata.name
-        self.__logger.debug("create_namespace: %s", api_response)
+        self.pool = pool.get_pool(
+            self.ns_generate_name,
+            {"pod-security.kubernetes.io/enforce": "baseline"},
+            config_maps=lambda namespace: {self.metadata_name: {
+                "ADDITIONAL_SHARED_CONFIG": "",
+                "ZONE": f'{namespace}.svc.cluster.local'}})
+        self.namespace = self.pool.acquire()
+        self.deployments = informer.Informer(
+            self.appsv1.list_namespaced_deployment, self.namespace).start()
+        self.pods = informer.Informer(
+            self.corev1.list_namespaced_pod, self.namespace).start()
+        self.endpoints = informer.Informer(
+            self.corev1.list_namespaced_endpoints, self.namespace).start()
         self.zone = f'{self.namespace}.svc.cluster.local'
-        metadata = client.V1ObjectMeta(
-            name=self.metadata_name, namespace=self.namespace)
-        body = client.V1ConfigMap(
-            metadata=metadata,
-            data={"ADDITIONAL_SHARED_CONFIG": "", "ZONE": self.zone})
-        api_response = self.corev1.create_namespaced_config_map(
-            self.namespace, body=body)
-        self.__logger.debug("create_namespaced_config_map: %s", api_response)
 
     @abc.abstractmethod
     def deploy_vnf(self):
@@ -94,27 +205,219 @@ class Vims(testcase.TestCase):  # pylint: disable=too-many-instance-attributes
     def wait_vnf(self):
         """Wait vIMS is up and running"""
         assert self.namespace
-        status = self.deployment_list.copy()
-        watch_deployment = watch.Watch()
-        for event in watch_deployment.stream(
-                func=self.appsv1.list_namespaced_deployment,
-                namespace=self.namespace, timeout_seconds=self.watch_timeout):
-            self.__logger.debug(event)
-            if event["object"].status.ready_replicas == 1:
-                if event['object'].metadata.name in status:
-                    status.remove(event['object'].metadata.name)
-                    self.__logger.info(
-                        "%s started in %0.2f sec",
-                        event['object'].metadata.name,
-                        time.time()-self.start_time)
-            if not status:
-                watch_deployment.stop()
+        status = self.deployments.wait_all(
+            self.deployment_list,
+            lambda deployment: deployment.status.ready_replicas == 1,
+            self.watch_timeout,
+            callback=lambda deployment: self.__logger.info(
+                "%s started in %0.2f sec", deployment.metadata.name,
+                time.time()-self.start_time))
         if not status:
             self.result = 1/2 * 100
             return True
         self.__logger.error("Cannot deploy vIMS")
         return False
 
+    @staticmethod
+    def _condition_time(pod, condition_type):
+        for condition in pod.status.conditions or []:
+            if condition.type == condition_type and condition.status == 'True':
+                return condition.last_transition_time.timestamp()
+        return None
+
+    def pod_milestones(self, pod, events):
+        """Return when the pod was created, scheduled, ready, etc.
+
+        The image pulls of the containers (init containers excluded) are
+        read from the events of the pod.
+        """
+        pulled = started = None
+        for event in events:
+            if not (event.involved_object.field_path or '').startswith(
+                    'spec.containers'):
+                continue
+            timestamp = (event.last_timestamp or event.event_time)
+            if event.reason == 'Pulled' and timestamp:
+                pulled = max(pulled or 0, timestamp.timestamp())
+        for status in pod.status.container_statuses or []:
+            if status.state.running and status.state.running.started_at:
+                started = max(
+                    started or 0, status.state.running.started_at.timestamp())
+        milestones = {
+            'created': pod.metadata.creation_timestamp.timestamp(),
+            'scheduled': self._condition_time(pod, 'PodScheduled'),
+            'initialized': self._condition_time(pod, 'Initialized'),
+            'pulled': pulled, 'started': started,
+            'ready': self._condition_time(pod, 'Ready')}
+        # the images already present are not pulled
+        if milestones['pulled'] is None and milestones['started']:
+            milestones['pulled'] = milestones['initialized']
+        return milestones
+
+    def pod_phases(self, milestones):
+        """Split the pod lifecycle in contiguous phases"""
+        phases = {}
+        previous = self.start_time
+        for phase, milestone in zip(self.timeline_phases, (
+                'created', 'scheduled', 'initialized', 'pulled', 'started',
+                'ready')):
+            if milestones[milestone] is None:
+                break
+            phases[phase] = max(0, milestones[milestone] - previous)
+            previous = max(previous, milestones[milestone])
+        return {'milestones': milestones, 'phases': phases,
+                'total': previous - self.start_time}
+
+    def build_timeline(self):
+        """Write the startup timeline of every Clearwater component
+
+        The pod lifecycle is split in contiguous phases (from the
+        deployment submission to the pod readiness). The component ready
+        last is the critical path. The timeline is written in
+        timeline.json and timeline.txt.
+        """
+        events = {}
+        for event in self.corev1.list_namespaced_event(
+                self.namespace,
+                field_selector='involvedObject.kind=Pod').items:
+            events.setdefault(event.involved_object.name, []).append(event)
+        timeline = {}
+        for pod in self.pods.cache.values():
+            component = (pod.metadata.labels or {}).get('service')
+            if component not in self.deployment_list:
+                continue
+            timeline[component] = self.pod_phases(self.pod_milestones(
+                pod, events.get(pod.metadata.name, [])))
+        self.details['timeline'] = {
+            component: value['phases'] for component, value in
+            timeline.items()}
+        msg = prettytable.PrettyTable(
+            header_style='upper', padding_width=5,
+            field_names=['component'] + list(self.timeline_phases) + [
+                'total'])
+        for component, value in sorted(
+                timeline.items(), key=lambda item: item[1]['total']):
+            msg.add_row([component] + [
+                f"{value['phases'][phase]:0.2f}"
+                if phase in value['phases'] else '-'
+                for phase in self.timeline_phases] + [
+                    f"{value['total']:0.2f}"])
+        report = f"Startup timeline (sec):\n\n{msg.get_string()}\n"
+        if timeline:
+            critical = max(timeline, key=lambda key: timeline[key]['total'])
+            self.details['critical_path'] = critical
+            total = timeline[critical]['total'] or 1
+            report += f"\nCritical path: {critical} ({total:0.2f} sec)\n"
+            for phase, duration in sorted(
+                    timeline[critical]['phases'].items(),
+                    key=lambda item: item[1], reverse=True):
+                report += (
+                    f"  {phase}: {duration:0.2f} sec "
+                    f"({duration / total * 100:0.0f}%)\n")
+        if not os.path.exists(self.res_dir):
+            os.makedirs(self.res_dir)
+        with open(os.path.join(self.res_dir, 'timeline.json'), 'w',
+                  encoding='utf-8') as file:
+            json.dump(timeline, file, indent=2)
+        with open(os.path.join(self.res_dir, 'timeline.txt'), 'w',
+                  encoding='utf-8') as file:
+            file.write(report)
+        self.__logger.info("\n\n%s", report)
+
+    def wait_endpoints(self, deadline):
+        """Wait for ready addresses behind the services to probe"""
+        return not self.endpoints.wait_all(
+            self.readiness_services,
+            lambda endpoints: any(
+                subset.addresses for subset in endpoints.subsets or []),
+            deadline - time.time(),
+            callback=lambda endpoints: self.__logger.info(
+                "%s endpoints ready in %0.2f sec", endpoints.metadata.name,
+                time.time()-self.start_time))
+
+    def wait_pod(self, name, timeout):
+        """Wait for the pod to succeed or fail and return its phase"""
+        self.pods.wait_all(
+            [name], lambda pod: pod.status.phase in ('Succeeded', 'Failed'),
+            timeout)
+        pod = self.pods.get(name)
+        return pod.status.phase if pod else None
+
+    def probe_services(self, deadline):
+        """Probe the SIP and HTTP ports from inside the cluster"""
+        checks = " && ".join(
+            f"nc -z -w 2 {service} {port}"
+            for service, ports in self.readiness_services.items()
+            for port in ports)
+        dockerhub_repo = os.getenv("DOCKERHUB_REPO", self.dockerhub_repo)
+        container = client.V1Container(
+            name=self.probe_container_name,
+            image=f"{dockerhub_repo}/{self.probe_image_name}",
+            command=["sh", "-c", f"until {checks}; do sleep 2; done"])
+        spec = client.V1PodSpec(
+            containers=[container], restart_policy="Never",
+            active_deadline_seconds=max(1, int(deadline - time.time())))
+        metadata = client.V1ObjectMeta(name=self.probe_container_name)
+        api_response = self.corev1.create_namespaced_pod(
+            self.namespace, client.V1Pod(metadata=metadata, spec=spec))
+        self.__logger.debug("create_namespaced_pod: %s", api_response)
+        phase = self.wait_pod(
+            self.probe_container_name, deadline - time.time())
+        api_response = self.corev1.delete_namespaced_pod(
+            name=self.probe_container_name, namespace=self.namespace)
+        self.__logger.debug("delete_namespaced_pod: %s", api_response)
+        return phase == 'Succeeded'
+
+    def wait_readiness(self):
+        """Wait for bono, ellis and sprout to answer
+
+        It waits for their endpoints and then probes their ports from
+        inside the cluster. readiness_timeout bounds the whole wait.
+        """
+        deadline = time.time() + self.readiness_timeout
+        try:
+            if self.wait_endpoints(deadline) and self.probe_services(
+                    deadline):
+                self.__logger.info(
+                    "vIMS answered in %0.2f sec", time.time()-self.start_time)
+                return True
+        except client.rest.ApiException:
+            self.__logger.exception("Cannot check the vIMS readiness")
+        self.__logger.warning(
+            "vIMS is not ready after %d sec, testing anyway",
+            self.readiness_timeout)
+        time.sleep(max(0, deadline - time.time()))
+        return False
+
+    def follow_log(self, name, parser, log_name, callback):
+        """Stream the pod log into log_name and parse it as it arrives
+
+        callback is called with the name, the status and the duration (or
+        None) of every test case as soon as it completes.
+        """
+        if not os.path.exists(self.res_dir):
+            os.makedirs(self.res_dir)
+        api_response = self.corev1.read_namespaced_pod_log(
+            name=name, namespace=self.namespace, follow=True,
+            timestamps=parser.timestamps, _preload_content=False)
+        with open(os.path.join(self.res_dir, log_name), 'wb') as log:
+            try:
+                for chunk in api_response.stream(4096):
+                    log.write(chunk)
+                    for test in parser.feed(chunk):
+                        callback(*test)
+            finally:
+                api_response.release_conn()
+        for test in parser.close():
+            callback(*test)
+
+    def log_test(self, name, status, _duration):
+        """Log the test case completed (failures as errors)"""
+        if status == 'Failed':
+            self.__logger.error("%s - %s", name, status)
+        else:
+            self.__logger.info("%s - %s", name, status)
+
     def test_vnf(self):
         """Test vIMS as proposed by clearwater-live-test
 
@@ -123,9 +426,9 @@ class Vims(testcase.TestCase):  # pylint: disable=too-many-instance-attributes
 
         See https://github.com/Metaswitch/clearwater-live-test for more details
         """
-        time.sleep(120)
         assert self.namespace
         assert self.zone
+        self.wait_readiness()
         container = client.V1Container(
             name=self.test_container_name, image=self.test_image_name,
             command=["rake", f"test[{self.zone}]",
@@ -136,29 +439,26 @@ class Vims(testcase.TestCase):  # pylint: disable=too-many-instance-attributes
         metadata = client.V1ObjectMeta(name=self.test_container_name)
         body = client.V1Pod(metadata=metadata, spec=spec)
         api_response = self.corev1.create_namespaced_pod(self.namespace, body)
-        watch_deployment = watch.Watch()
-        for event in watch_deployment.stream(
-                func=self.corev1.list_namespaced_pod,
-                namespace=self.namespace, timeout_seconds=self.watch_timeout):
-            self.__logger.debug(event)
-            if event["object"].metadata.name == self.test_container_name:
-                if event["object"].status.phase in ('Succeeded', 'Failed'):
-                    watch_deployment.stop()
-        api_response = self.corev1.read_namespaced_pod_log(
-            name=self.test_container_name, namespace=self.namespace)
-        self.__logger.info(api_response)
+        self.__logger.debug("create_namespaced_pod: %s", api_response)
+        self.pods.wait_all(
+            [self.test_container_name],
+            lambda pod: pod.status.phase in (
+                'Running', 'Succeeded', 'Failed'),
+            self.watch_timeout)
+        parser = LiveTestParser()
+        self.follow_log(
+            self.test_container_name, parser, 'live-test.log', self.log_test)
+        self.wait_pod(self.test_container_name, self.watch_timeout)
+        self.details['tests'] = parser.tests
         vims_test_result = {}
         try:
-            grp = re.search(
-                r'^(\d+) failures out of (\d+) tests run.*\n'
-                r'(\d+) tests skipped$', api_response,
-                re.MULTILINE | re.DOTALL)
-            assert grp
-            vims_test_result["failures"] = int(grp.group(1))
-            vims_test_result["total"] = int(grp.group(2))
-            vims_test_result["skipped"] = int(grp.group(3))
+            assert parser.summary
+            vims_test_result["failures"] = parser.summary['failures']
+            vims_test_result["total"] = parser.summary['total']
+            vims_test_result["skipped"] = parser.summary['skipped']
             vims_test_result['passed'] = (
-                int(grp.group(2)) - int(grp.group(3)) - int(grp.group(1)))
+                vims_test_result["total"] - vims_test_result["skipped"] -
+                vims_test_result["failures"])
             if vims_test_result['total'] - vims_test_result['skipped'] > 0:
                 vnf_test_rate = vims_test_result['passed'] / (
                     vims_test_result['total'] - vims_test_result['skipped'])
@@ -166,38 +466,152 @@ class Vims(testcase.TestCase):  # pylint: disable=too-many-instance-attributes
                 vnf_test_rate = 0
             self.result += 1/2 * 100 * vnf_test_rate
         except Exception:  # pylint: disable=broad-except
-            self.__logger.exception("Cannot parse live tests results")
+            self.__logger.exception(
+                "Cannot parse live tests results:\n%s",
+                "\n".join(parser.tail))
+
+    def load_pod(self, name, duration, tests):
+        """Create a pod running clearwater-live-test in a loop
+
+        The test cases selected are run again and again until duration
+        has elapsed (the last run is completed).
+        """
+        rake = (
+            f"rake 'test[{self.zone}]' PROXY=bono.{self.zone} "
+            f"ELLIS=ellis.{self.zone} SIGNUP_CODE=secret TESTS='{tests}' "
+            "--trace")
+        container = client.V1Container(
+            name=self.load_container_name, image=self.test_image_name,
+            command=["sh", "-c", (
+                f"end=$(($(date +%s)+{int(duration)})); "
+                f"while [ $(date +%s) -lt $end ]; do {rake}; done")])
+        spec = client.V1PodSpec(containers=[container], restart_policy="Never")
+        metadata = client.V1ObjectMeta(
+            name=name, labels={"app": self.load_container_name})
+        api_response = self.corev1.create_namespaced_pod(
+            self.namespace, client.V1Pod(metadata=metadata, spec=spec))
+        self.__logger.debug("create_namespaced_pod: %s", api_response)
+
+    def load_vnf(self, **kwargs):
+        """Load vIMS with concurrent clearwater-live-test pods
+
+        load_pods pods register and call via bono and sprout for
+        load_duration seconds. The passed "Basic Call" tests per second,
+        the success ratio and the durations of the registration and call
+        tests (each includes the ellis signup, the registration, the call
+        and the teardown) are aggregated in details. The SIP registration
+        and call setup latencies aren't measured on their own as
+        clearwater-live-test only prints the test durations. The test is
+        successful if the call tests/s reach load_threshold.
+        """
+        assert self.namespace
+        assert self.zone
+        count = kwargs.get('load_pods')
+        duration = kwargs.get('load_duration', self.load_duration)
+        self.wait_readiness()
+        names = [f"{self.load_container_name}-{index}"
+                 for index in range(count)]
+        for name in names:
+            self.load_pod(
+                name, duration, kwargs.get('load_tests', self.load_tests))
+        self.pods.wait_all(
+            names, lambda pod: pod.status.phase in (
+                'Running', 'Succeeded', 'Failed'),
+            self.watch_timeout)
+        lock = threading.Lock()
+        statuses = collections.Counter()
+        passed = collections.Counter()
+        durations = {key: [] for key in self.load_test_durations}
+
+        def collect(name, status, duration):
+            with lock:
+                statuses[status] += 1
+                if status != 'Passed':
+                    return
+                for key, pattern in self.load_test_durations.items():
+                    if pattern in name:
+                        passed[key] += 1
+                        if duration is not None:
+                            durations[key].append(duration)
+
+        start = time.time()
+        with futures.ThreadPoolExecutor(max_workers=count) as executor:
+            for job in [executor.submit(
+                    self.follow_log, name, LiveTestParser(timestamps=True),
+                    f'{name}.log', collect) for name in names]:
+                job.result()
+        elapsed = time.time() - start
+        for name in names:
+            self.wait_pod(name, self.watch_timeout)
+        self.report_load(
+            {'pods': count, 'duration': elapsed,
+             'threshold': kwargs.get('load_threshold', self.load_threshold)},
+            statuses, passed, durations)
+
+    def report_load(self, load, statuses, passed, durations):
+        """Aggregate the load results in details and compute the result"""
+        run = statuses['Passed'] + statuses['Failed']
+        load.update({
+            'tests': run, 'passed': statuses['Passed'],
+            'failed': statuses['Failed'],
+            'success_ratio': statuses['Passed'] / run if run else 0,
+            'call_tests_per_sec': (
+                passed['call_test'] / load['duration']
+                if load['duration'] else 0),
+            'test_durations': {}})
+        msg = prettytable.PrettyTable(
+            header_style='upper', padding_width=5,
+            field_names=['test duration (sec)'] + [
+                f'p{percent}' for percent in self.load_percentiles])
+        for key, values in durations.items():
+            values.sort()
+            load['test_durations'][key] = {
+                f'p{percent}': percentile(values, percent)
+                for percent in self.load_percentiles}
+            msg.add_row([key] + [
+                '-' if value is None else f'{value:0.2f}'
+                for value in load['test_durations'][key].values()])
+        self.details['load'] = load
+        self.__logger.info(
+            "%d tests run by %d pods in %0.2f sec (%0.2f%% passed), "
+            "%0.2f call tests/s\n\n%s\n", run, load['pods'],
+            load['duration'], load['success_ratio'] * 100,
+            load['call_tests_per_sec'], msg.get_string())
+        if load['call_tests_per_sec'] >= load['threshold']:
+            self.result += 1/2 * 100
+        else:
+            self.__logger.error(
+                "%0.2f call tests/s is below %s call tests/s",
+                load['call_tests_per_sec'], load['threshold'])
 
     def run(self, **kwargs):
         self.start_time = time.time()
         try:
             self.prepare_vnf()
             self.deploy_vnf()
-            if self.wait_vnf():
+            ready = self.wait_vnf()
+            try:
+                self.build_timeline()
+            except Exception:  # pylint: disable=broad-except
+                self.__logger.exception("Cannot build the startup timeline")
+            if ready and kwargs.get('load_pods'):
+                self.load_vnf(**kwargs)
+            elif ready:
                 self.test_vnf()
         except client.rest.ApiException:
             self.__logger.exception("Cannot deploy and test vIms")
         self.stop_time = time.time()
 
     def clean(self):
-        try:
-            api_response = self.corev1.delete_namespaced_pod(
-                name=self.test_container_name, namespace=self.namespace)
-            self.__logger.debug("delete_namespaced_pod: %s", api_response)
-        except client.rest.ApiException:
-            pass
-        try:
-            api_response = self.corev1.delete_namespaced_config_map(
-                name=self.metadata_name, namespace=self.namespace)
-            self.__logger.debug(
-                "delete_namespaced_config_map: %s", api_response)
-        except client.rest.ApiException:
-            pass
-        try:
-            api_response = self.corev1.delete_namespace(self.namespace)
-            self.__logger.debug("delete_namespace: %s", self.namespace)
-        except client.rest.ApiException:
-            pass
+        """Stop watching and release the namespace
+
+        The namespace and all its objects are deleted in the background.
+        """
+        for watcher in (self.deployments, self.pods, self.endpoints):
+            if watcher:
+                watcher.stop()
+        if self.pool:
+            self.pool.release(self.namespace)
 
 
 class K8sVims(Vims):
@@ -214,53 +628,20 @@ class K8sVims(Vims):
     def deploy_vnf(self):
         """Deploy vIMS via kubectl as proposed by clearwater-docker
 
+        The manifests are rendered once and all objects are applied
+        concurrently.
+
         See https://github.com/Metaswitch/clearwater-docker for more details
         """
         assert self.namespace
-        for deployment in self.deployment_list:
-            with open(pkg_resources.resource_filename(
-                    'functest_kubernetes',
-                    f'ims/{deployment}-depl.yaml'),
-                    encoding='utf-8') as yfile:
-                template = Template(yfile.read())
-                body = yaml.safe_load(template.render(
-                    dockerhub_repo=os.getenv(
-                        "DOCKERHUB_REPO", self.dockerhub_repo),
-                    quay_repo=os.getenv(
-                        "QUAY_REPO", self.quay_repo)))
-                resp = self.appsv1.create_namespaced_deployment(
-                    body=body, namespace=self.namespace)
-                self.__logger.info("Deployment %s created", resp.metadata.name)
-                self.__logger.debug(
-                    "create_namespaced_deployment: %s", resp)
-        for service in self.deployment_list:
-            with open(pkg_resources.resource_filename(
-                    'functest_kubernetes', f'ims/{service}-svc.yaml'),
-                    encoding='utf-8') as yfile:
-                body = yaml.safe_load(yfile)
-                resp = self.corev1.create_namespaced_service(
-                    body=body, namespace=self.namespace)
-                self.__logger.info("Service %s created", resp.metadata.name)
-                self.__logger.debug(
-                    "create_namespaced_service: %s", resp)
-
-    def clean(self):
-        for deployment in self.deployment_list:
-            try:
-                api_response = self.appsv1.delete_namespaced_deployment(
-                    name=deployment, namespace=self.namespace)
-                self.__logger.debug(
-                    "delete_namespaced_deployment: %s", api_response)
-            except client.rest.ApiException:
-                pass
-            try:
-                api_response = self.corev1.delete_namespaced_service(
-                    name=deployment, namespace=self.namespace)
-                self.__logger.debug(
-                    "delete_namespaced_service: %s", api_response)
-            except client.rest.ApiException:
-                pass
-        super().clean()
+        dockerhub_repo = os.getenv("DOCKERHUB_REPO", self.dockerhub_repo)
+        quay_repo = os.getenv("QUAY_REPO", self.quay_repo)
+        manifest.Applier().apply([
+            manifest.render(
+                f'ims/{name}-{suffix}.yaml', dockerhub_repo=dockerhub_repo,
+                quay_repo=quay_repo)
+            for suffix in ('depl', 'svc')
+            for name in self.deployment_list], self.namespace)
 
 
 class HelmVims(Vims):
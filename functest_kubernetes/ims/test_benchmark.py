@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2018 All rights reserved
+# This program and the accompanying materials
+# are made available under the terms of the Apache License, Version 2.0
+# which accompanies this distribution, and is available at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+
+"""Define the classes required to fully cover benchmark."""
+
+import logging
+import unittest
+
+from kubernetes import client
+import mock
+
+from functest_kubernetes import pool
+from functest_kubernetes.ims import benchmark
+
+
+class CountRequestsTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    @mock.patch('kubernetes.client.rest.RESTClientObject.request')
+    def test_count(self, *args):
+        request = client.rest.RESTClientObject.request
+        with benchmark.count_requests() as counter:
+            client.rest.RESTClientObject.request(None, 'GET', 'url')
+            client.rest.RESTClientObject.request(None, 'POST', 'url')
+            client.rest.RESTClientObject.request(None, 'GET', 'url')
+        self.assertEqual(counter, {'GET': 2, 'POST': 1})
+        self.assertIs(client.rest.RESTClientObject.request, request)
+        self.assertEqual(args[0].call_count, 3)
+
+    def test_disable_prefill(self):
+        size = pool.Pool.size
+        pool.Pool.size = 2
+        try:
+            with benchmark.disable_prefill():
+                self.assertEqual(pool.Pool.size, 0)
+            self.assertEqual(pool.Pool.size, 2)
+        finally:
+            pool.Pool.size = size
+
+
+class VimsBenchmarkTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    @mock.patch('kubernetes.config.load_kube_config')
+    def setUp(self, *args):
+        self.benchmark = benchmark.VimsBenchmark(case_name='vims_benchmark')
+        self.benchmark.corev1 = mock.Mock()
+        self.benchmark.corev1.read_namespace.side_effect = (
+            client.rest.ApiException(status=404))
+        self.drivers = {'k8s': mock.Mock(), 'helm': mock.Mock()}
+        self.benchmark.drivers = self.drivers
+        args[0].assert_called_once_with()
+
+    @mock.patch('functest_kubernetes.ims.benchmark.VimsBenchmark.'
+                'apiserver_requests', side_effect=[10, 25])
+    def test_deploy(self, *args):
+        driver = self.drivers['k8s'].return_value
+        driver.namespace = 'ims-0'
+        result = self.benchmark.deploy('k8s', 0)
+        self.drivers['k8s'].assert_called_once_with(
+            case_name='vims_benchmark_k8s_0', project_name='xtesting')
+        driver.prepare_vnf.assert_called_once_with()
+        driver.deploy_vnf.assert_called_once_with()
+        driver.clean.assert_called_once_with()
+        self.assertIsNotNone(result['ready'])
+        self.assertEqual(result['apiserver_requests'], 15)
+        self.assertEqual(result['process_requests'], 0)
+        self.assertIsNotNone(result['clean'])
+        self.assertIsNotNone(result['teardown'])
+        self.assertEqual(args[0].call_count, 2)
+
+    @mock.patch('functest_kubernetes.ims.benchmark.VimsBenchmark.'
+                'apiserver_requests', return_value=None)
+    def test_deploy_failed(self, *args):
+        driver = self.drivers['helm'].return_value
+        driver.deploy_vnf.side_effect = client.rest.ApiException(status=500)
+        result = self.benchmark.deploy('helm', 1)
+        self.assertIsNone(result['ready'])
+        self.assertNotIn('submit', result)
+        self.assertNotIn('apiserver_requests', result)
+        driver.clean.assert_called_once_with()
+        args[0].assert_called_once_with()
+
+    @mock.patch('functest_kubernetes.ims.benchmark.VimsBenchmark.'
+                'apiserver_requests', side_effect=[10, None])
+    def test_deploy_metrics_lost(self, *args):
+        result = self.benchmark.deploy('k8s', 0)
+        self.assertNotIn('apiserver_requests', result)
+        self.assertEqual(args[0].call_count, 2)
+
+    def test_summarize(self):
+        summary = self.benchmark.summarize([
+            {'driver': 'k8s', 'ready': 10, 'submit': 1},
+            {'driver': 'k8s', 'ready': 20, 'submit': 3},
+            {'driver': 'helm', 'ready': None, 'submit': 2}])
+        self.assertEqual(summary['k8s']['runs'], 2)
+        self.assertEqual(summary['k8s']['failures'], 0)
+        self.assertEqual(
+            summary['k8s']['ready'], {'mean': 15, 'min': 10, 'max': 20})
+        self.assertEqual(summary['helm']['failures'], 1)
+        self.assertNotIn('ready', summary['helm'])
+        self.assertIn('15.00 [10.00-20.00]', self.benchmark.report(summary))
+        self.assertNotIn('clean', self.benchmark.report(summary))
+
+    @mock.patch('functest_kubernetes.ims.benchmark.VimsBenchmark.deploy')
+    def test_run(self, *args):
+        sizes = []
+
+        def deploy(name, iteration):
+            sizes.append(pool.Pool.size)
+            return {'driver': name, 'iteration': iteration, 'ready': 1}
+
+        args[0].side_effect = deploy
+        with mock.patch('builtins.open', mock.mock_open()), \
+                mock.patch('os.makedirs'), \
+                mock.patch.object(pool.Pool, 'size', 1):
+            self.benchmark.run(iterations=2)
+        self.assertEqual(args[0].call_args_list, [
+            mock.call('k8s', 0), mock.call('helm', 0),
+            mock.call('k8s', 1), mock.call('helm', 1)])
+        self.assertEqual(sizes, [0, 0, 0, 0])
+        self.assertEqual(self.benchmark.result, 100)
+
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    unittest.main(verbosity=2)
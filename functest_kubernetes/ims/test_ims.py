@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2018 All rights reserved
+# This program and the accompanying materials
+# are made available under the terms of the Apache License, Version 2.0
+# which accompanies this distribution, and is available at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+
+"""Define the classes required to fully cover ims."""
+
+import collections
+import datetime
+import logging
+import unittest
+
+from kubernetes import client
+import mock
+
+from functest_kubernetes.ims import ims
+
+
+def _time(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp)
+
+
+def _pod(name, service, started=None, ready=None):
+    pod = mock.Mock()
+    pod.metadata.name = name
+    pod.metadata.labels = {'service': service}
+    pod.metadata.creation_timestamp = _time(101)
+    pod.status.conditions = [
+        mock.Mock(type='PodScheduled', status='True',
+                  last_transition_time=_time(102)),
+        mock.Mock(type='Initialized', status='True',
+                  last_transition_time=_time(103)),
+        mock.Mock(type='Ready', status='True' if ready else 'False',
+                  last_transition_time=_time(ready) if ready else None)]
+    status = mock.Mock()
+    status.state.running = (
+        mock.Mock(started_at=_time(started)) if started else None)
+    pod.status.container_statuses = [status]
+    return pod
+
+
+def _event(name, field_path, timestamp):
+    event = mock.Mock(reason='Pulled', event_time=None)
+    event.involved_object.name = name
+    event.involved_object.field_path = field_path
+    event.last_timestamp = _time(timestamp)
+    return event
+
+
+class LiveTestParserTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    def setUp(self):
+        self.parser = ims.LiveTestParser()
+
+    def test_feed(self):
+        self.assertEqual(self.parser.feed(
+            b'Basic Registration (TCP) - Passed\nBasic Call - Mainl'), [
+                ('Basic Registration (TCP)', 'Passed', None)])
+        self.assertEqual(self.parser.feed(
+            b'ine (TCP) - Failed\r\n  RuntimeError thrown\n'), [
+                ('Basic Call - Mainline (TCP)', 'Failed', None)])
+        self.assertEqual(self.parser.feed(
+            b'SUBSCRIBE - reg-event (UDP) - Skipped (No Memento)\n'), [
+                ('SUBSCRIBE - reg-event (UDP)', 'Skipped', None)])
+        self.assertEqual(self.parser.feed(
+            b'1 failures out of 3 tests run\n1 tests skipped'), [])
+        self.assertEqual(self.parser.close(), [])
+        self.assertEqual(self.parser.tests, {
+            'Basic Registration (TCP)': 'Passed',
+            'Basic Call - Mainline (TCP)': 'Failed',
+            'SUBSCRIBE - reg-event (UDP)': 'Skipped'})
+        self.assertEqual(self.parser.summary, {
+            'failures': 1, 'total': 3, 'skipped': 1})
+        self.assertEqual(self.parser.tail[-1], '1 tests skipped')
+
+    def test_no_summary(self):
+        self.parser.feed(b'rake aborted!\n')
+        self.assertEqual(self.parser.summary, {})
+        self.assertEqual(list(self.parser.tail), ['rake aborted!'])
+
+    def test_multibyte(self):
+        data = 'Café (TCP) - Passed\n'.encode('utf-8')
+        self.assertEqual(self.parser.feed(data[:4]), [])
+        self.assertEqual(self.parser.feed(data[4:]), [
+            ('Café (TCP)', 'Passed', None)])
+
+    def test_numbers(self):
+        self.assertEqual(self.parser.feed(
+            b'Basic Call - Mainline (TCP) - (6505550123, 6505550456) '
+            b'Passed\n'), [('Basic Call - Mainline (TCP)', 'Passed', None)])
+
+    def test_timestamps(self):
+        parser = ims.LiveTestParser(timestamps=True)
+        self.assertEqual(parser.feed(
+            b'2026-10-18T12:00:00.5Z ** Execute test\n'
+            b'2026-10-18T12:00:02Z Basic Registration (TCP) - Passed\n'
+            b'2026-10-18T12:00:05.250000000Z Basic Call - Mainline (TCP) '
+            b'- Passed\n'), [
+                ('Basic Registration (TCP)', 'Passed', 1.5),
+                ('Basic Call - Mainline (TCP)', 'Passed', 3.25)])
+
+
+class PercentileTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    def test_empty(self):
+        self.assertIsNone(ims.percentile([], 50))
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(ims.percentile(values, 50), 50)
+        self.assertEqual(ims.percentile(values, 99), 99)
+        self.assertEqual(ims.percentile(values, 100), 100)
+        self.assertEqual(ims.percentile([3], 95), 3)
+
+
+class VimsTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    @mock.patch('kubernetes.config.load_kube_config')
+    def setUp(self, *args):
+        self.vims = ims.K8sVims(case_name='k8s_vims')
+        self.vims.corev1 = mock.Mock()
+        args[0].assert_called_once_with()
+
+    def test_report_load(self):
+        self.vims.report_load(
+            {'pods': 2, 'duration': 10, 'threshold': 0.2},
+            collections.Counter(Passed=3, Failed=1),
+            collections.Counter(registration_test=2, call_test=1),
+            {'registration_test': [2.0, 1.0], 'call_test': [4.0]})
+        load = self.vims.details['load']
+        self.assertEqual(load['tests'], 4)
+        self.assertEqual(load['success_ratio'], 0.75)
+        self.assertEqual(load['call_tests_per_sec'], 0.1)
+        self.assertEqual(load['test_durations']['registration_test'], {
+            'p50': 1.0, 'p95': 2.0, 'p99': 2.0})
+        self.assertEqual(self.vims.result, 0)
+        self.vims.report_load(
+            {'pods': 2, 'duration': 10, 'threshold': 0.1},
+            collections.Counter(Passed=1), collections.Counter(call_test=1),
+            {'registration_test': [], 'call_test': []})
+        self.assertEqual(self.vims.result, 50)
+
+    @mock.patch('functest_kubernetes.ims.ims.manifest.Applier')
+    def test_deploy_vnf(self, *args):
+        self.vims.namespace = 'ims-0'
+        with mock.patch.dict('os.environ', {'DOCKERHUB_REPO': 'mirror'}):
+            self.vims.deploy_vnf()
+        args[0].return_value.apply.assert_called_once()
+        bodies, namespace = args[0].return_value.apply.call_args[0]
+        self.assertEqual(namespace, 'ims-0')
+        self.assertEqual(
+            len(bodies), 2 * len(self.vims.deployment_list))
+        self.assertEqual(
+            {(body['kind'], body['metadata']['name']) for body in bodies},
+            {(kind, name) for kind in ('Deployment', 'Service')
+             for name in self.vims.deployment_list})
+        self.assertTrue(all(
+            container['image'].startswith('mirror/')
+            for body in bodies if body['kind'] == 'Deployment'
+            for container in body['spec']['template']['spec']['containers']
+            if 'clearwater' in container['image']))
+
+    def test_pod_phases(self):
+        self.vims.start_time = 100
+        timeline = self.vims.pod_phases(self.vims.pod_milestones(
+            _pod('bono-0', 'bono', started=111, ready=115), [
+                _event('bono-0', 'spec.initContainers{init}', 200),
+                _event('bono-0', 'spec.containers{bono}', 108),
+                _event('bono-0', 'spec.containers{tailer}', 110)]))
+        self.assertEqual(timeline['phases'], {
+            'submission': 1, 'scheduling': 1, 'initialization': 1,
+            'image pull': 7, 'start': 1, 'readiness': 4})
+        self.assertEqual(timeline['total'], 15)
+
+    def test_pod_phases_present(self):
+        self.vims.start_time = 100
+        timeline = self.vims.pod_phases(self.vims.pod_milestones(
+            _pod('bono-0', 'bono', started=104, ready=106), []))
+        self.assertEqual(timeline['milestones']['pulled'], 103)
+        self.assertEqual(timeline['phases']['image pull'], 0)
+        self.assertEqual(timeline['phases']['start'], 1)
+        self.assertEqual(timeline['total'], 6)
+
+    def test_pod_phases_not_ready(self):
+        self.vims.start_time = 100
+        timeline = self.vims.pod_phases(self.vims.pod_milestones(
+            _pod('bono-0', 'bono', started=104), []))
+        self.assertIsNone(timeline['milestones']['ready'])
+        self.assertNotIn('readiness', timeline['phases'])
+        self.assertEqual(timeline['total'], 4)
+        timeline = self.vims.pod_phases(self.vims.pod_milestones(
+            _pod('bono-0', 'bono'), []))
+        self.assertIsNone(timeline['milestones']['pulled'])
+        self.assertEqual(
+            list(timeline['phases']),
+            ['submission', 'scheduling', 'initialization'])
+        self.assertEqual(timeline['total'], 3)
+
+    @mock.patch('os.makedirs')
+    @mock.patch('builtins.open', new_callable=mock.mock_open)
+    def test_build_timeline(self, *args):
+        self.vims.start_time = 100
+        self.vims.pods = mock.Mock(cache={
+            'bono-0': _pod('bono-0', 'bono', started=111, ready=115),
+            'ellis-0': _pod('ellis-0', 'ellis', started=104, ready=106),
+            'probe': _pod('probe', None, started=104, ready=200)})
+        self.vims.corev1.list_namespaced_event.return_value.items = [
+            _event('bono-0', 'spec.containers{bono}', 110)]
+        self.vims.build_timeline()
+        self.assertEqual(self.vims.details['critical_path'], 'bono')
+        self.assertEqual(
+            sorted(self.vims.details['timeline']), ['bono', 'ellis'])
+        report = "".join(
+            call[0][0] for call in args[0].return_value.write.call_args_list)
+        self.assertIn("Critical path: bono (15.00 sec)", report)
+        self.assertIn("image pull: 7.00 sec (47%)", report)
+        self.assertIn("readiness: 4.00 sec (27%)", report)
+
+    def test_probe_services(self):
+        self.vims.namespace = 'ims-0'
+        self.vims.pods = mock.Mock()
+        self.vims.pods.get.return_value.status.phase = 'Succeeded'
+        self.assertTrue(self.vims.probe_services(ims.time.time() + 60))
+        body = self.vims.corev1.create_namespaced_pod.call_args[0][1]
+        self.assertEqual(
+            body.spec.containers[0].image, 'docker.io/library/busybox:1.28')
+        command = body.spec.containers[0].command[2]
+        self.assertIn("nc -z -w 2 bono 5060", command)
+        self.assertIn("nc -z -w 2 ellis 80", command)
+        self.assertGreater(body.spec.active_deadline_seconds, 50)
+        self.vims.corev1.delete_namespaced_pod.assert_called_once_with(
+            name='readiness-probe', namespace='ims-0')
+        self.vims.pods.get.return_value.status.phase = 'Failed'
+        self.assertFalse(self.vims.probe_services(ims.time.time() + 60))
+
+    @mock.patch('time.sleep')
+    @mock.patch('functest_kubernetes.ims.ims.Vims.probe_services')
+    @mock.patch('functest_kubernetes.ims.ims.Vims.wait_endpoints')
+    def test_wait_readiness(self, *args):
+        self.vims.start_time = ims.time.time()
+        args[0].return_value = True
+        args[1].return_value = True
+        self.assertTrue(self.vims.wait_readiness())
+        args[2].assert_not_called()
+        args[1].return_value = False
+        self.assertFalse(self.vims.wait_readiness())
+        args[2].assert_called_once()
+        args[1].side_effect = client.rest.ApiException(status=500)
+        self.assertFalse(self.vims.wait_readiness())
+        args[0].return_value = False
+        args[1].reset_mock()
+        self.assertFalse(self.vims.wait_readiness())
+        args[1].assert_not_called()
+
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    unittest.main(verbosity=2)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2020 Orange and others.
+#
+# All rights reserved. This program and the accompanying materials
+# are made available under the terms of the Apache License, Version 2.0
+# which accompanies this distribution, and is available at
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+Share one list and watch per resource kind between several waiters.
+"""
+
+import logging
+import threading
+import time
+
+from kubernetes import client
+from kubernetes import watch
+
+
+class Informer():
+    # pylint: disable=too-many-instance-attributes
+    """List and watch one resource kind and keep a local cache
+
+    The objects are indexed by name. The waiters register predicates which
+    are evaluated on the cache every time it changes. The watch is resumed
+    from the last resourceVersion and the objects are only listed again if
+    it has expired. Several informers may share the same condition to wait
+    on all their caches at once.
+    """
+
+    __logger = logging.getLogger(__name__)
+
+    watch_timeout = 300
+    retry_delay = 1
+
+    def __init__(self, list_func, namespace=None, condition=None, **kwargs):
+        self.list_func = list_func
+        self.namespace = namespace
+        self.kwargs = kwargs
+        self.cache = {}
+        self.resource_version = None
+        self.condition = condition or threading.Condition()
+        self._stopped = threading.Event()
+        self._watch = None
+        self._thread = None
+
+    def _list(self, **kwargs):
+        if self.namespace:
+            return self.list_func(self.namespace, **kwargs)
+        return self.list_func(**kwargs)
+
+    def relist(self):
+        """List all objects and reset the cache"""
+        api_response = self._list(**self.kwargs)
+        with self.condition:
+            self.cache = {
+                item.metadata.name: item for item in api_response.items}
+            self.resource_version = api_response.metadata.resource_version
+            self.condition.notify_all()
+        self.__logger.debug(
+            "%s: %d objects listed at %s", self.list_func.__name__,
+            len(self.cache), self.resource_version)
+
+    def _handle(self, event):
+        obj = event['object']
+        with self.condition:
+            if event['type'] in ('ADDED', 'MODIFIED'):
+                self.cache[obj.metadata.name] = obj
+            elif event['type'] == 'DELETED':
+                self.cache.pop(obj.metadata.name, None)
+            self.resource_version = obj.metadata.resource_version
+            self.condition.notify_all()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._watch = watch.Watch()
+            kwargs = dict(
+                self.kwargs, resource_version=self.resource_version,
+                allow_watch_bookmarks=True,
+                timeout_seconds=self.watch_timeout)
+            if self.namespace:
+                kwargs['namespace'] = self.namespace
+            try:
+                for event in self._watch.stream(
+                        func=self.list_func, **kwargs):
+                    self.__logger.debug(
+                        "%s: %s", self.list_func.__name__, event['type'])
+                    self._handle(event)
+            except client.rest.ApiException as exc:
+                if self._stopped.is_set():
+                    return
+                if exc.status == 410:
+                    self.__logger.debug(
+                        "%s: watch expired", self.list_func.__name__)
+                else:
+                    self.__logger.warning(
+                        "%s: watch failed: %s", self.list_func.__name__,
+                        exc.reason)
+                    time.sleep(self.retry_delay)
+                self._relist_safely()
+            except Exception:  # pylint: disable=broad-except
+                if self._stopped.is_set():
+                    return
+                self.__logger.exception(
+                    "%s: watch failed", self.list_func.__name__)
+                time.sleep(self.retry_delay)
+                self._relist_safely()
+
+    def _relist_safely(self):
+        try:
+            self.relist()
+        except Exception:  # pylint: disable=broad-except
+            self.__logger.exception(
+                "%s: cannot list", self.list_func.__name__)
+
+    def start(self):
+        """List the objects and start watching them"""
+        self.relist()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop watching (the thread ends with the current request)"""
+        self._stopped.set()
+        if self._watch:
+            self._watch.stop()
+        with self.condition:
+            self.condition.notify_all()
+
+    def get(self, name):
+        """Return the cached object"""
+        with self.condition:
+            return self.cache.get(name)
+
+    def wait(self, predicate, timeout):
+        """Wait for any cached object satisfying predicate
+
+        It returns the object or None if the timeout has expired.
+        """
+        with self.condition:
+            objs = []
+            self.condition.wait_for(lambda: self._stopped.is_set() or any(
+                objs.append(obj) or True for obj in self.cache.values()
+                if predicate(obj)), timeout)
+            return objs[0] if objs else None
+
+    def wait_all(self, names, predicate, timeout, callback=None):
+        """Wait for all named objects to satisfy predicate
+
+        callback is called with every object once it satisfies predicate.
+        It returns the names of the objects which are still pending.
+        """
+        pending = set(names)
+        deadline = time.time() + timeout
+
+        def update():
+            for name in list(pending):
+                obj = self.cache.get(name)
+                if obj is not None and predicate(obj):
+                    pending.remove(name)
+                    if callback:
+                        callback(obj)
+            return not pending or self._stopped.is_set()
+
+        with self.condition:
+            while not update():
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+        return pending
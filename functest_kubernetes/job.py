@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2020 Orange and others.
+#
+# All rights reserved. This program and the accompanying materials
+# are made available under the terms of the Apache License, Version 2.0
+# which accompanies this distribution, and is available at
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+Wait for Jobs and fail as soon as they cannot succeed.
+"""
+
+import logging
+import threading
+import time
+
+from functest_kubernetes import informer
+
+
+class JobRunner():
+    """Watch the target Jobs and their pods only
+
+    A single Job is watched by field selector (all Jobs of the namespace
+    are watched if there are several) and the pods by label selector.
+    The Jobs fail as soon as they are marked as failed (e.g. their
+    backoff limit is exhausted) or as one of their pods cannot start (e.g.
+    ImagePullBackOff).
+    """
+
+    __logger = logging.getLogger(__name__)
+
+    pod_failures = (
+        'ImagePullBackOff', 'ErrImageNeverPull', 'InvalidImageName',
+        'CreateContainerConfigError', 'CreateContainerError')
+
+    def __init__(self, batchv1, corev1, namespace, names):
+        self.batchv1 = batchv1
+        self.corev1 = corev1
+        self.namespace = namespace
+        self.names = list(names)
+        self.outcomes = {}
+
+    def _selectors(self):
+        if len(self.names) == 1:
+            return ({'field_selector': f'metadata.name={self.names[0]}'},
+                    {'label_selector': f'job-name={self.names[0]}'})
+        return ({}, {
+            'label_selector': f"job-name in ({','.join(self.names)})"})
+
+    @staticmethod
+    def _condition(job, condition_type):
+        for condition in job.status.conditions or []:
+            if condition.type == condition_type and condition.status == 'True':
+                return condition
+        return None
+
+    def pod_failure(self, pod):
+        """Return why the pod cannot start (or None)"""
+        for status in (pod.status.init_container_statuses or []) + (
+                pod.status.container_statuses or []):
+            waiting = status.state.waiting if status.state else None
+            if waiting and waiting.reason in self.pod_failures:
+                return waiting.reason, waiting.message
+        return None
+
+    def outcome(self, job, pods):
+        """Return the outcome of the Job (or None if it's still running)"""
+        outcome = {
+            'job': job.metadata.name, 'pod': None, 'node': None,
+            'start_time': (
+                job.status.start_time.timestamp()
+                if job.status.start_time else None)}
+        if pods:
+            pod = max(pods, key=lambda pod: pod.status.phase == 'Succeeded')
+            outcome['pod'] = pod.metadata.name
+            outcome['node'] = pod.spec.node_name
+        complete = self._condition(job, 'Complete')
+        failed = self._condition(job, 'Failed')
+        if complete or job.status.succeeded:
+            outcome.update({
+                'status': 'succeeded', 'reason': None, 'message': None,
+                'completion_time': (
+                    job.status.completion_time.timestamp()
+                    if job.status.completion_time else time.time())})
+        elif failed:
+            outcome.update({
+                'status': 'failed', 'reason': failed.reason,
+                'message': failed.message,
+                'completion_time': (
+                    failed.last_transition_time.timestamp()
+                    if failed.last_transition_time else time.time())})
+        else:
+            for pod in pods:
+                failure = self.pod_failure(pod)
+                if failure:
+                    outcome.update({
+                        'status': 'failed', 'reason': failure[0],
+                        'message': failure[1], 'pod': pod.metadata.name,
+                        'node': pod.spec.node_name,
+                        'completion_time': time.time()})
+                    break
+            else:
+                return None
+        if outcome['start_time']:
+            outcome['duration'] = (
+                outcome['completion_time'] - outcome['start_time'])
+        return outcome
+
+    def _update(self, jobs, pods, start):
+        for name in self.names:
+            if name in self.outcomes or name not in jobs.cache:
+                continue
+            outcome = self.outcome(jobs.cache[name], [
+                pod for pod in pods.cache.values()
+                if (pod.metadata.labels or {}).get('job-name') == name])
+            if outcome:
+                outcome['wait'] = time.time() - start
+                self.outcomes[name] = outcome
+                if outcome['status'] == 'succeeded':
+                    self.__logger.info(
+                        "%s succeeded in %0.2f sec", name, outcome['wait'])
+                else:
+                    self.__logger.error(
+                        "%s failed in %0.2f sec: %s %s", name,
+                        outcome['wait'], outcome['reason'],
+                        outcome['message'] or '')
+        return len(self.outcomes) == len(self.names)
+
+    def wait(self, timeout):
+        """Wait for all Jobs and return their outcomes indexed by name
+
+        The Jobs still running after timeout are timed out.
+        """
+        start = time.time()
+        condition = threading.Condition()
+        job_selector, pod_selector = self._selectors()
+        jobs = informer.Informer(
+            self.batchv1.list_namespaced_job, self.namespace,
+            condition=condition, **job_selector).start()
+        pods = informer.Informer(
+            self.corev1.list_namespaced_pod, self.namespace,
+            condition=condition, **pod_selector).start()
+        try:
+            with condition:
+                condition.wait_for(
+                    lambda: self._update(jobs, pods, start), timeout)
+        finally:
+            jobs.stop()
+            pods.stop()
+        for name in self.names:
+            if name not in self.outcomes:
+                self.__logger.error(
+                    "%s not completed after %d sec", name, timeout)
+                self.outcomes[name] = {
+                    'job': name, 'status': 'timeout', 'reason': None,
+                    'message': None, 'pod': None, 'node': None,
+                    'wait': time.time() - start}
+        return self.outcomes
@@ -14,26 +14,60 @@ Define the parent for Kubernetes testing.
 
 from __future__ import division
 
+from concurrent import futures
+import heapq
+import json
 import logging
 import os
 from pathlib import Path
-import re
+import shutil
+import signal
 import subprocess
+import tempfile
+import textwrap
+import threading
 import time
 import yaml
 
+from kubernetes import client
+from kubernetes import config
+from kubernetes import utils
+import prettytable
 from xtesting.core import testcase
 
+from functest_kubernetes import cache
+from functest_kubernetes import ginkgo
+from functest_kubernetes import metrics
+
 
 class E2ETesting(testcase.TestCase):
     """Kubernetes test runner"""
-    # pylint: disable=too-many-instance-attributes
+    # pylint: disable=too-many-instance-attributes,too-many-public-methods
 
     __logger = logging.getLogger(__name__)
 
     config = f'{Path.home()}/.kube/config'
+    e2e_test = '/usr/local/bin/e2e.test'
     gcr_repo = os.getenv("MIRROR_REPO", "gcr.io")
     k8s_gcr_repo = os.getenv("MIRROR_REPO", "registry.k8s.io")
+    profile_top = 20
+    profile_buckets = (1, 10, 60, 300)
+    regression_factor = 1.5
+    regression_minimum = 5
+    serial_regex = r'\[Serial\]|\[Disruptive\]'
+    suite_description = "Kubernetes e2e suite"
+    max_regex_length = 100000
+    max_nodes = 25
+    fallback_nodes = 10
+    nodes_per_node = 4
+    cpu_per_node = 1
+    memory_per_node = 2 * 1024 ** 3
+    cache_dir = os.getenv("E2E_CACHE_DIR", "/home/opnfv/functest/cache")
+    cache_max_size = 1024 ** 3
+    stall_timeout = 3600
+    stall_grace = 300
+    stall_report_delay = 10
+    cached_files = ('results.json', 'durations.json', 'profile.txt')
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -41,6 +75,8 @@ class E2ETesting(testcase.TestCase):
         self.dir_results = "/home/opnfv/functest/results"
         self.res_dir = os.path.join(self.dir_results, self.case_name)
         self.result = 0
+        self.specs = ginkgo.SpecResults()
+        self.parsers = []
         self.start_time = 0
         self.stop_time = 0
         self.output_log_name = 'functest-kubernetes.log'
@@ -55,16 +91,77 @@ class E2ETesting(testcase.TestCase):
         except ValueError:
             return {}
 
-    def run_kubetest(self, **kwargs):  # pylint: disable=too-many-branches
-        """Run the test suites"""
+    def auto_nodes(self, kubeconfig, **kwargs):
+        """Size the ginkgo parallelism from the cluster capacity
+
+        It considers the ready and schedulable nodes (the taints listed in
+        NON_BLOCKING_TAINTS are tolerated as e2e.test does) and their
+        allocatable cpu and memory. The parallelism is capped to protect
+        the API server.
+        """
+        non_blocking_taints = os.environ.get(
+            "NON_BLOCKING_TAINTS", "").split(',')
+        corev1 = client.CoreV1Api(
+            config.new_client_from_config(config_file=kubeconfig))
+        count = cpu = memory = 0
+        for node in corev1.list_node().items:
+            if node.spec.unschedulable or any(
+                    taint.effect in ('NoSchedule', 'NoExecute') and
+                    taint.key not in non_blocking_taints
+                    for taint in node.spec.taints or []):
+                continue
+            if not any(
+                    condition.type == 'Ready' and condition.status == 'True'
+                    for condition in node.status.conditions or []):
+                continue
+            count += 1
+            cpu += utils.parse_quantity(node.status.allocatable['cpu'])
+            memory += utils.parse_quantity(node.status.allocatable['memory'])
+        nodes = max(1, min(
+            count * kwargs.get('nodes_per_node', self.nodes_per_node),
+            int(cpu / kwargs.get('cpu_per_node', self.cpu_per_node)),
+            int(memory / kwargs.get(
+                'memory_per_node', self.memory_per_node)),
+            kwargs.get('max_nodes', self.max_nodes)))
+        self.__logger.info(
+            "%d schedulable nodes (%s cpu, %s memory): %d ginkgo nodes",
+            count, cpu, memory, nodes)
+        return nodes
+
+    def resolve_nodes(self, kubeconfig, share=1, **kwargs):
+        """Return the ginkgo parallelism
+
+        If nodes is auto, the cluster capacity is shared by the ginkgo
+        processes running concurrently against it. It falls back to
+        fallback_nodes if the nodes can't be listed (e.g. RBAC).
+        """
+        if kwargs.get('nodes') != 'auto':
+            return kwargs.get('nodes', 1)
+        try:
+            return max(1, self.auto_nodes(kubeconfig, **kwargs) // share)
+        except Exception as exc:  # pylint: disable=broad-except
+            nodes = max(1, kwargs.get(
+                'fallback_nodes', self.fallback_nodes) // share)
+            self.__logger.warning(
+                "Cannot size the ginkgo parallelism (%s), falling back to "
+                "%d", exc, nodes)
+            return nodes
+
+    def run_ginkgo(self, ginkgo_args, kubeconfig, report_dir, **kwargs):
+        # pylint: disable=too-many-locals
+        """Run ginkgo once
+
+        It returns the ginkgo output parser and the specs read from the
+        reports written in report_dir.
+        """
         cmd_line = [
             'ginkgo', f'--nodes={kwargs.get("nodes", 1)}',
-            '--no-color', '/usr/local/bin/e2e.test', '--',
-            '-kubeconfig', self.config,
+            '--no-color', self.e2e_test, '--',
+            '-kubeconfig', kubeconfig,
             '-provider', kwargs.get('provider', 'local'),
-            '-report-dir', self.res_dir]
-        for arg in kwargs.get("ginkgo", {}):
-            cmd_line.extend([f'-ginkgo.{arg}', kwargs["ginkgo"][arg]])
+            '-report-dir', report_dir]
+        for arg in ginkgo_args:
+            cmd_line.extend([f'-ginkgo.{arg}', ginkgo_args[arg]])
         for key, value in self.convert_ini_to_dict(
                 os.environ.get("E2E_TEST_OPTS", "")).items():
             cmd_line.extend([f'-{key}', value])
@@ -72,47 +169,529 @@ class E2ETesting(testcase.TestCase):
             cmd_line.extend(
                 ['-non-blocking-taints', os.environ["NON_BLOCKING_TAINTS"]])
         cmd_line.extend(['-disable-log-dump'])
-        self._generate_repo_list_file()
         self.__logger.info("Starting k8s test: '%s'.", cmd_line)
         env = os.environ.copy()
         env["KUBE_TEST_REPO_LIST"] = f"{self.res_dir}/repositories.yml"
-        with subprocess.Popen(
-                cmd_line, stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT, env=env) as process:
-            boutput = process.stdout.read()
-        with open(os.path.join(
-                self.res_dir, 'e2e.log'), 'w', encoding='utf-8') as foutput:
-            foutput.write(boutput.decode("utf-8"))
-        grp = re.search(
-            r'^(FAIL|SUCCESS)!.* ([0-9]+) Passed \| ([0-9]+) Failed \|'
-            r' ([0-9]+) Pending \| ([0-9]+) Skipped',
-            boutput.decode("utf-8", errors="ignore"),
-            re.MULTILINE | re.DOTALL)
+        if not os.path.exists(report_dir):
+            os.makedirs(report_dir)
+        for report in ginkgo.junit_reports(report_dir):
+            os.remove(report)
+        parser = ginkgo.OutputParser()
+        self.parsers.append(parser)
+        stop = threading.Event()
+        with open(os.path.join(report_dir, 'e2e.log'), 'wb') as foutput, \
+                subprocess.Popen(
+                    cmd_line, stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT, env=env) as process:
+            watchdog = threading.Thread(
+                target=self.watch_stall, daemon=True,
+                args=(process, parser, stop, kubeconfig, report_dir),
+                kwargs=kwargs)
+            watchdog.start()
+            try:
+                for chunk in iter(lambda: process.stdout.read1(65536), b''):
+                    foutput.write(chunk)
+                    parser.feed(chunk)
+            finally:
+                stop.set()
+                watchdog.join()
+        parser.close()
+        return parser, ginkgo.parse_reports(report_dir)
+
+    def watch_stall(self, process, parser, stop, kubeconfig, report_dir,
+                    **kwargs):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """Interrupt ginkgo if it doesn't print anything for a while
+
+        It asks ginkgo for a progress report of the specs in flight, dumps
+        the events of the e2e namespaces and then interrupts ginkgo which
+        still writes its reports. It's killed if it doesn't exit in time.
+        """
+        timeout = kwargs.get('stall_timeout', self.stall_timeout)
+        if not timeout:
+            return
+        while not stop.wait(min(timeout, 60)):
+            if time.time() - parser.updated < timeout:
+                continue
+            self.__logger.error(
+                "ginkgo hasn't printed anything for %d sec, interrupting it",
+                time.time() - parser.updated)
+            parser.stalled = True
+            try:
+                self.diagnose_stall(process, parser, kubeconfig, report_dir)
+            except Exception:  # pylint: disable=broad-except
+                self.__logger.exception("Cannot diagnose the stall")
+            process.send_signal(signal.SIGINT)
+            if stop.wait(kwargs.get('stall_grace', self.stall_grace)):
+                return
+            self.__logger.error("ginkgo hasn't exited, killing it")
+            process.kill()
+            return
+
+    def diagnose_stall(self, process, parser, kubeconfig, report_dir):
+        """Write the specs in flight and the e2e events in stall.log"""
+        process.send_signal(signal.SIGUSR1)
+        time.sleep(self.stall_report_delay)
+        corev1 = client.CoreV1Api(
+            config.new_client_from_config(config_file=kubeconfig))
+        with open(os.path.join(report_dir, 'stall.log'), 'w',
+                  encoding='utf-8') as file:
+            file.write("Last ginkgo output:\n")
+            file.write("".join(f"{line}\n" for line in list(parser.tail)))
+            for namespace in corev1.list_namespace(
+                    label_selector='e2e-run').items:
+                file.write(f"\nEvents in {namespace.metadata.name}:\n")
+                for event in corev1.list_namespaced_event(
+                        namespace.metadata.name).items:
+                    file.write(
+                        f"{event.last_timestamp} {event.type} {event.reason}"
+                        f" {event.involved_object.kind}/"
+                        f"{event.involved_object.name}: {event.message}\n")
+        self.__logger.error(
+            "Stall diagnostics written in %s",
+            os.path.join(report_dir, 'stall.log'))
+
+    def collect_metrics(self):
+        """Return the progress of the ginkgo runs"""
+        total = sum(parser.total for parser in self.parsers)
+        done = sum(parser.done for parser in self.parsers)
+        failed = sum(parser.failed for parser in self.parsers)
+        elapsed = time.time() - self.start_time if self.start_time else 0
+        rate = done / elapsed if elapsed > 0 else 0
+        eta = max(0, total - done) / rate if rate else -1
+        return {
+            'functest_e2e_specs': ("Specs to run", total),
+            'functest_e2e_specs_done': ("Specs which have run", done),
+            'functest_e2e_specs_passed': (
+                "Specs which have passed", max(0, done - failed)),
+            'functest_e2e_specs_failed': ("Specs which have failed", failed),
+            'functest_e2e_specs_rate': ("Specs run per second", rate),
+            'functest_e2e_eta_seconds': (
+                "Estimated time to complete (-1 if unknown)", eta),
+            'functest_e2e_last_output_timestamp_seconds': (
+                "Last time ginkgo printed anything", max(
+                    (parser.updated for parser in self.parsers),
+                    default=self.start_time))}
+
+    def shard(self, **kwargs):
+        """Split the selected specs in shards balanced by their durations
+
+        The durations are read from a previous durations.json. It returns
+        the ginkgo arguments of every shard. The last one runs the specs
+        unknown in the durations (e.g. new specs) and, if only one cluster
+        is available, the specs which must not run concurrently.
+        """
+        path = kwargs.get(
+            'durations', os.path.join(self.res_dir, 'durations.json'))
         try:
-            assert grp
-        except AssertionError:
-            self.__logger.exception(
-                "Can not find the overall result in \n%s",
-                boutput.decode("utf-8", errors="ignore"))
-            return False
-        self.details['passed'] = int(grp.group(2))
-        self.details['failed'] = int(grp.group(3))
-        self.details['pending'] = int(grp.group(4))
-        self.details['skipped'] = int(grp.group(5))
+            with open(path, encoding='utf-8') as file:
+                durations = json.load(file)
+        except (OSError, ValueError):
+            self.__logger.warning(
+                "Cannot read the spec durations in %s, sharding is disabled",
+                path)
+            return []
+        args = kwargs.get("ginkgo", {})
+        selected = ginkgo.select(
+            durations, args.get('focus'), args.get('skip'))
+        if len(kwargs.get('kubeconfigs', [self.config])) == 1:
+            selected = ginkgo.select(selected, exclude=self.serial_regex)
+        shards = ginkgo.balance(
+            {name: durations[name] for name in selected}, kwargs['shards'])
+        if not shards:
+            self.__logger.warning(
+                "No spec can be sharded, sharding is disabled")
+            return []
+        skip = ginkgo.focus(selected, self.suite_description)
+        if args.get('skip'):
+            skip = f"{args['skip']}|{skip}"
+        if len(skip) > self.max_regex_length:
+            self.__logger.warning(
+                "Too many specs to shard, sharding is disabled")
+            return []
+        shard_args = []
+        for names in shards:
+            shard_args.append(
+                {key: value for key, value in args.items() if key != 'skip'})
+            shard_args[-1]['focus'] = ginkgo.focus(
+                names, self.suite_description)
+            self.__logger.info(
+                "Shard %d: %d specs for %0.2f sec", len(shard_args),
+                len(names), sum(durations[name] for name in names))
+        shard_args.append(dict(args, skip=skip))
+        return shard_args
+
+    def run_shards(self, shards, **kwargs):
+        """Run the shards concurrently
+
+        The shards are dispatched over the kubeconfigs. If only one
+        kubeconfig is given, the last shard runs once the others are over.
+        """
+        kubeconfigs = kwargs.get('kubeconfigs', [self.config])
+        concurrent = shards if len(kubeconfigs) > 1 else shards[:-1]
+        dispatch = [kubeconfigs[index % len(kubeconfigs)]
+                    for index in range(len(concurrent))]
+        nodes = {kubeconfig: self.resolve_nodes(
+            kubeconfig, dispatch.count(kubeconfig), **kwargs)
+                 for kubeconfig in set(dispatch)}
+        with futures.ThreadPoolExecutor(
+                max_workers=len(concurrent)) as executor:
+            outputs = [executor.submit(
+                self.run_ginkgo, args, dispatch[index],
+                os.path.join(self.res_dir, f'shard-{index}'),
+                **dict(kwargs, nodes=nodes[dispatch[index]]))
+                for index, args in enumerate(concurrent)]
+            outputs = [output.result() for output in outputs]
+        if len(concurrent) < len(shards):
+            outputs.append(self.run_ginkgo(
+                shards[-1], kubeconfigs[0],
+                os.path.join(self.res_dir, f'shard-{len(concurrent)}'),
+                **dict(kwargs, nodes=self.resolve_nodes(
+                    kubeconfigs[0], **kwargs))))
+        return outputs
+
+    def compute_result(self):
+        """Compute the result from the details"""
         self.__logger.debug("details: %s", self.details)
         self.result = self.details['passed'] * 100 / (
             self.details['passed'] + self.details['failed'] +
             self.details['pending'])
         self.__logger.debug("result: %s", self.result)
-        if grp.group(1) == 'FAIL':
-            grp2 = re.search(
-                r'^(Summarizing [0-9]+ Failure.*)Ran',
-                boutput.decode("utf-8", errors="ignore"),
-                re.MULTILINE | re.DOTALL)
-            if grp2:
-                self.__logger.error(grp2.group(1))
+
+    def process_results(self, outputs, previous=None, **kwargs):
+        """Merge the results of all ginkgo runs
+
+        The results of a previous run may be given to only override the
+        specs which have been rerun.
+        """
+        summary = dict.fromkeys(('passed', 'failed', 'pending', 'skipped'), 0)
+        total = 0
+        self.specs = ginkgo.SpecResults()
+        for parser, specs in outputs:
+            if parser.stalled:
+                self.details['stalled'] = True
+            if specs:
+                counters = specs.counters()
+            elif parser.summary:
+                self.__logger.warning("Can not find any report")
+                counters = parser.summary
+            else:
+                self.__logger.error(
+                    "Can not find the overall result in \n%s",
+                    "\n".join(parser.tail))
+                # keep the progress counters of the interrupted runs
+                self.details.update({
+                    'done': sum(parser.done for parser, _ in outputs),
+                    'failed': sum(parser.failed for parser, _ in outputs),
+                    'stalled': any(parser.stalled for parser, _ in outputs)})
+                return False
+            self.specs.update(specs)
+            for key in summary:
+                summary[key] += counters[key]
+            total = max(total, sum(counters[key] for key in summary))
+            if counters['status'] == 'FAIL':
+                if parser.failures:
+                    self.__logger.error("\n".join(parser.failures))
+                else:
+                    self.__logger.error(
+                        "Failed specs:\n%s", "\n".join(specs.failed()))
+        # every run counts the specs selected by the others as skipped
+        summary['skipped'] = max(0, total - (
+            summary['passed'] + summary['failed'] + summary['pending']))
+        if previous is not None:
+            self.details['rerun'] = len(self.specs)
+            previous.specs.update(self.specs.specs)
+            self.specs = previous
+            summary = self.specs.counters()
+            del summary['status']
+        self.details.update(summary)
+        self.details['specs'] = self.specs.specs
+        with open(os.path.join(self.res_dir, 'results.json'), 'w',
+                  encoding='utf-8') as file:
+            json.dump(self.details, file)
+        self.compute_result()
+        if self.specs:
+            try:
+                self.profile_specs(**kwargs)
+            except (OSError, ValueError):
+                self.__logger.exception("Cannot profile the specs")
         return True
 
+    def load_results(self):
+        """Load the results of the previous run saved in results.json"""
+        try:
+            with open(os.path.join(self.res_dir, 'results.json'),
+                      encoding='utf-8') as file:
+                details = json.load(file)
+            previous = ginkgo.SpecResults(details['specs'])
+            previous.skipped = details['skipped']
+        except (OSError, ValueError, KeyError):
+            return None
+        return previous
+
+    def rerun_failed(self, previous, **kwargs):
+        """Rerun only the specs which failed in the previous run"""
+        failed = previous.failed()
+        self.__logger.info(
+            "Rerunning %d failed specs:\n%s", len(failed), "\n".join(failed))
+        args = {key: value for key, value in kwargs.get("ginkgo", {}).items()
+                if key not in ('focus', 'skip')}
+        args['focus'] = ginkgo.focus(failed, self.suite_description)
+        outputs = [self.run_ginkgo(
+            args, self.config, self.res_dir,
+            **dict(kwargs, nodes=self.resolve_nodes(self.config, **kwargs)))]
+        return self.process_results(outputs, previous=previous, **kwargs)
+
+    def cache_key(self, **kwargs):
+        """Return the key of the results in the cache
+
+        It combines the server version, the digest of e2e.test, the ginkgo
+        arguments, the e2e.test options and the repositories list.
+        """
+        version = client.VersionApi(config.new_client_from_config(
+            config_file=self.config)).get_code()
+        with open(os.path.join(self.res_dir, 'repositories.yml'),
+                  encoding='utf-8') as file:
+            repositories = file.read()
+        return cache.Cache.key(
+            version.git_version, cache.digest(self.e2e_test),
+            kwargs.get("ginkgo", {}), kwargs.get('provider', 'local'),
+            os.environ.get("E2E_TEST_OPTS", ""),
+            os.environ.get("NON_BLOCKING_TAINTS", ""), repositories)
+
+    def replay_results(self, entry):
+        """Replay the results stored in the cache entry"""
+        for path in os.listdir(entry):
+            shutil.copy2(os.path.join(entry, path), self.res_dir)
+        previous = self.load_results()
+        if previous is None:
+            return False
+        self.specs = previous
+        with open(os.path.join(self.res_dir, 'results.json'),
+                  encoding='utf-8') as file:
+            self.details.update(json.load(file))
+        self.compute_result()
+        return True
+
+    def store_results(self, results_cache, key):
+        """Store the results and the reports in the cache"""
+        results_cache.put(key, [
+            os.path.join(self.res_dir, path) for path in self.cached_files
+            if os.path.isfile(os.path.join(self.res_dir, path))] +
+            ginkgo.junit_reports(self.res_dir))
+
+    def list_specs(self, **kwargs):
+        """List all specs of e2e.test
+
+        It runs e2e.test in dry-run mode once per e2e.test digest and
+        caches the spec names. It returns None if the dry-run fails.
+        """
+        specs_cache = cache.Cache(
+            kwargs.get('cache_dir', self.cache_dir),
+            kwargs.get('cache_max_size', self.cache_max_size))
+        key = cache.Cache.key('specs', cache.digest(self.e2e_test))
+        entry = specs_cache.get(key)
+        if not entry:
+            report_dir = tempfile.mkdtemp()
+            try:
+                cmd_line = [
+                    self.e2e_test, '-ginkgo.dry-run', '-ginkgo.no-color',
+                    '-kubeconfig', self.config, '-report-dir', report_dir]
+                self.__logger.info("Listing the specs: '%s'.", cmd_line)
+                process = subprocess.run(
+                    cmd_line, stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT, check=False)
+                specs = ginkgo.parse_reports(report_dir)
+                if process.returncode or not specs:
+                    self.__logger.error(
+                        "Cannot list the specs (exit code %d):\n%s",
+                        process.returncode, "\n".join(process.stdout.decode(
+                            "utf-8", errors="replace").splitlines()[-50:]))
+                    return None
+                with open(os.path.join(report_dir, 'specs.json'), 'w',
+                          encoding='utf-8') as file:
+                    json.dump(list(specs.specs), file)
+                specs_cache.put(
+                    key, [os.path.join(report_dir, 'specs.json')])
+            finally:
+                shutil.rmtree(report_dir, ignore_errors=True)
+            entry = specs_cache.get(key)
+        with open(os.path.join(entry, 'specs.json'),
+                  encoding='utf-8') as file:
+            return json.load(file)
+
+    def estimate(self, **kwargs):
+        """Count the selected specs and estimate their runtime
+
+        The focus and skip filters are evaluated locally against the list
+        of specs and the runtime is estimated from the durations of a
+        previous run (the mean duration is used for the unknown specs).
+        """
+        args = kwargs.get("ginkgo", {})
+        specs = self.list_specs(**kwargs)
+        if specs is None:
+            return False
+        selected = ginkgo.select(specs, args.get('focus'), args.get('skip'))
+        path = kwargs.get(
+            'durations', os.path.join(self.res_dir, 'durations.json'))
+        try:
+            with open(path, encoding='utf-8') as file:
+                durations = json.load(file)
+        except (OSError, ValueError):
+            self.__logger.warning("Cannot read the spec durations in %s", path)
+            durations = {}
+        mean = sum(durations.values()) / len(durations) if durations else 0
+        serial = set(ginkgo.select(selected, self.serial_regex))
+        nodes = kwargs.get('nodes', 1)
+        if not isinstance(nodes, int):
+            nodes = self.resolve_nodes(self.config, **kwargs)
+        estimated = sum(
+            durations.get(name, mean) / (1 if name in serial else nodes)
+            for name in selected)
+        with open(os.path.join(self.res_dir, 'selected.txt'), 'w',
+                  encoding='utf-8') as file:
+            file.write("".join(f'{name}\n' for name in selected))
+        self.details = {
+            'selected': len(selected), 'serial': len(serial),
+            'unknown': len([name for name in selected
+                            if name not in durations]),
+            'estimated': round(estimated, 2)}
+        self.__logger.info(
+            "%d specs selected (%d serial, %d without duration), "
+            "estimated runtime: %0.2f sec with %d ginkgo nodes",
+            len(selected), len(serial), self.details['unknown'], estimated,
+            nodes)
+        self.result = 100
+        return True
+
+    def run_kubetest(self, **kwargs):
+        """Run the test suites"""
+        if kwargs.get('dry_run', os.environ.get(
+                "E2E_DRY_RUN", "false").lower() == "true"):
+            return self.estimate(**kwargs)
+        self._generate_repo_list_file()
+        textfile = kwargs.get(
+            'metrics_file', os.environ.get("E2E_METRICS_FILE"))
+        port = kwargs.get('metrics_port', os.environ.get("E2E_METRICS_PORT"))
+        if not textfile and not port:
+            return self.run_specs(**kwargs)
+        exporter = metrics.Exporter(
+            self.collect_metrics, {'case': self.case_name}, textfile=textfile,
+            port=int(port) if port else None)
+        exporter.start()
+        try:
+            return self.run_specs(**kwargs)
+        finally:
+            exporter.stop()
+
+    def run_specs(self, **kwargs):
+        """Run the selected specs (or only the failed ones)"""
+        if kwargs.get('rerun_failed'):
+            previous = self.load_results()
+            if previous and previous.failed():
+                return self.rerun_failed(previous, **kwargs)
+            self.__logger.warning(
+                "No failed spec found in the previous results, "
+                "running all specs")
+        results_cache = key = None
+        if kwargs.get('cache'):
+            results_cache = cache.Cache(
+                kwargs.get('cache_dir', self.cache_dir),
+                kwargs.get('cache_max_size', self.cache_max_size))
+            try:
+                key = self.cache_key(**kwargs)
+                entry = results_cache.get(key)
+                if entry and self.replay_results(entry):
+                    self.__logger.info(
+                        "Results replayed from the cache (%s)", key)
+                    return True
+            except Exception:  # pylint: disable=broad-except
+                self.__logger.exception("Cannot read the cache")
+        shards = []
+        if kwargs.get('shards', 1) > 1:
+            shards = self.shard(**kwargs)
+        if shards:
+            outputs = self.run_shards(shards, **kwargs)
+        else:
+            outputs = [self.run_ginkgo(
+                kwargs.get("ginkgo", {}), self.config, self.res_dir,
+                **dict(kwargs, nodes=self.resolve_nodes(
+                    self.config, **kwargs)))]
+        if not self.process_results(outputs, **kwargs):
+            return False
+        if self.details.get('stalled') or not all(
+                specs for _, specs in outputs):
+            self.__logger.warning(
+                "The results are incomplete, they are not cached")
+        elif key:
+            try:
+                self.store_results(results_cache, key)
+            except OSError:
+                self.__logger.exception("Cannot write the cache")
+        return True
+
+    def profile_specs(self, **kwargs):
+        """Profile the spec durations
+
+        It dumps the durations in durations.json (which may be reused as
+        baseline) and writes the slowest specs, the duration histogram per
+        SIG and the regressions versus the baseline in profile.txt.
+        """
+        durations = self.specs.durations()
+        with open(os.path.join(self.res_dir, 'durations.json'), 'w',
+                  encoding='utf-8') as file:
+            json.dump(durations, file)
+        msg = prettytable.PrettyTable(
+            header_style='upper', padding_width=5,
+            field_names=['spec', 'duration'])
+        for name in heapq.nlargest(
+                kwargs.get('profile_top', self.profile_top),
+                durations, key=durations.get):
+            msg.add_row(
+                [textwrap.fill(name, width=80), f'{durations[name]:0.2f}'])
+        profile = f"Slowest specs:\n\n{msg.get_string()}\n"
+        buckets = self.profile_buckets
+        msg = prettytable.PrettyTable(
+            header_style='upper', padding_width=5,
+            field_names=['sig', 'specs', 'duration'] + [
+                f'<{bucket}s' for bucket in buckets] + [f'>={buckets[-1]}s'])
+        sig_durations = {}
+        for name, duration in durations.items():
+            sig = ginkgo.sig(name)
+            sig_durations[sig] = sig_durations.get(sig, 0) + duration
+        for sig, counters in sorted(
+                ginkgo.histogram(durations, buckets).items()):
+            msg.add_row(
+                [sig, sum(counters), f'{sig_durations[sig]:0.2f}'] + counters)
+        profile += f"\nDurations per SIG:\n\n{msg.get_string()}\n"
+        if kwargs.get('baseline'):
+            with open(kwargs['baseline'], encoding='utf-8') as file:
+                baseline = json.load(file)
+            self.details['regressions'] = ginkgo.regressions(
+                durations, baseline,
+                kwargs.get('regression_factor', self.regression_factor),
+                kwargs.get('regression_minimum', self.regression_minimum))
+            msg = prettytable.PrettyTable(
+                header_style='upper', padding_width=5,
+                field_names=['spec', 'baseline', 'duration', 'factor'])
+            for name, (before, after) in sorted(
+                    self.details['regressions'].items(),
+                    key=lambda item: item[1][0] - item[1][1]):
+                msg.add_row(
+                    [textwrap.fill(name, width=80), f'{before:0.2f}',
+                     f'{after:0.2f}',
+                     f'{after / before:0.2f}' if before else 'inf'])
+            profile += f"\nRegressions:\n\n{msg.get_string()}\n"
+            if self.details['regressions']:
+                self.__logger.warning(
+                    "%d specs regressed versus %s:\n\n%s\n",
+                    len(self.details['regressions']), kwargs['baseline'],
+                    msg.get_string())
+        with open(os.path.join(self.res_dir, 'profile.txt'), 'w',
+                  encoding='utf-8') as file:
+            file.write(profile)
+        self.__logger.info("\n\n%s", profile)
+
     def run(self, **kwargs):
         res = self.EX_RUN_ERROR
         if not os.path.exists(self.res_dir):
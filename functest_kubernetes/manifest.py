@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2020 Orange and others.
+#
+# All rights reserved. This program and the accompanying materials
+# are made available under the terms of the Apache License, Version 2.0
+# which accompanies this distribution, and is available at
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+Render the packaged manifests and apply them in batches.
+"""
+
+from concurrent import futures
+import copy
+import logging
+import os
+import threading
+import yaml
+
+from jinja2 import Template
+from kubernetes import client
+from kubernetes import dynamic
+import pkg_resources
+
+_lock = threading.Lock()
+_templates = {}
+_renders = {}
+
+
+def _load(path):
+    mtime = os.path.getmtime(path)
+    with _lock:
+        if path in _templates and _templates[path][0] == mtime:
+            return _templates[path]
+    with open(path, encoding='utf-8') as yfile:
+        template = Template(yfile.read())
+    with _lock:
+        _templates[path] = (mtime, template)
+    return mtime, template
+
+
+def load_template(path):
+    """Return the compiled template (compiled again if the file changed)"""
+    return _load(path)[1]
+
+
+def render(manifest, loader=yaml.safe_load, **kwargs):
+    """Render and parse the manifest packaged in functest_kubernetes
+
+    The renders are memoized by the variables (e.g. the mirror repos). A
+    copy is returned as the body may be modified by the caller.
+    """
+    path = pkg_resources.resource_filename('functest_kubernetes', manifest)
+    mtime, template = _load(path)
+    key = (path, mtime, loader, tuple(sorted(kwargs.items())))
+    with _lock:
+        body = _renders.get(key)
+    if body is None:
+        body = loader(template.render(**kwargs))
+        with _lock:
+            _renders[key] = body
+    return copy.deepcopy(body)
+
+
+class Applier():
+    """Apply batches of objects concurrently via server-side apply
+
+    The objects are created or updated whatever their kinds. The errors
+    are collected and raised together.
+    """
+
+    __logger = logging.getLogger(__name__)
+
+    field_manager = "functest-kubernetes"
+    max_workers = 8
+
+    def __init__(self, api_client=None):
+        self.api_client = api_client
+        self._client = None
+
+    @property
+    def dynamic_client(self):
+        """Return the dynamic client (the API is discovered once)"""
+        if not self._client:
+            self._client = dynamic.DynamicClient(
+                self.api_client or client.ApiClient())
+        return self._client
+
+    def resource(self, body):
+        """Return the API resource of the object"""
+        return self.dynamic_client.resources.get(
+            api_version=body['apiVersion'], kind=body['kind'])
+
+    def apply_one(self, resource, body, namespace=None):
+        """Apply the object (force the conflicts as its only manager)"""
+        return self.dynamic_client.server_side_apply(
+            resource, body=body, namespace=namespace,
+            field_manager=self.field_manager, force_conflicts=True)
+
+    def apply(self, bodies, namespace=None):
+        """Apply all objects concurrently and return them as applied"""
+        errors = []
+        applied = []
+        with futures.ThreadPoolExecutor(
+                max_workers=self.max_workers) as executor:
+            jobs = {
+                executor.submit(
+                    self.apply_one, self.resource(body), body,
+                    namespace): body for body in bodies}
+            for job in futures.as_completed(jobs):
+                body = jobs[job]
+                try:
+                    resp = job.result()
+                except client.rest.ApiException as exc:
+                    errors.append(
+                        f"{body['kind']} {body['metadata']['name']}: "
+                        f"{exc.status} {exc.reason}")
+                    continue
+                self.__logger.info(
+                    "%s %s applied", body['kind'], resp.metadata.name)
+                self.__logger.debug("server_side_apply: %s", resp)
+                applied.append(resp)
+        if errors:
+            errors.sort()
+            self.__logger.error(
+                "Cannot apply %d objects:\n%s", len(errors),
+                "\n".join(errors))
+            raise client.rest.ApiException(reason="\n".join(errors))
+        return applied
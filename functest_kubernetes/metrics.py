@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2018 All rights reserved
+# This program and the accompanying materials
+# are made available under the terms of the Apache License, Version 2.0
+# which accompanies this distribution, and is available at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+
+"""
+Expose live metrics in the OpenMetrics text format.
+"""
+
+from http import server
+import logging
+import os
+import threading
+
+
+def render(metrics, labels):
+    """Render the metrics (a dict name: (help, value)) as OpenMetrics"""
+    label_str = ",".join(
+        f'{key}="{value}"' for key, value in sorted(labels.items()))
+    lines = []
+    for name, (description, value) in metrics.items():
+        lines.extend([
+            f'# HELP {name} {description}', f'# TYPE {name} gauge',
+            f'{name}{{{label_str}}} {value}'])
+    lines.append('# EOF')
+    return "\n".join(lines) + "\n"
+
+
+class Exporter():
+    # pylint: disable=too-many-instance-attributes
+    """Expose the metrics returned by collect
+
+    The metrics are periodically written in a textfile (e.g. for the
+    textfile collector of the node exporter) and/or served over HTTP.
+    """
+
+    __logger = logging.getLogger(__name__)
+
+    def __init__(self, collect, labels, textfile=None, port=None,
+                 interval=10):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self.collect = collect
+        self.labels = labels
+        self.textfile = textfile
+        self.port = port
+        self.interval = interval
+        self._stop = threading.Event()
+        self._threads = []
+        self._server = None
+
+    def render(self):
+        """Render the current metrics"""
+        return render(self.collect(), self.labels)
+
+    def write(self):
+        """Write the current metrics atomically in the textfile"""
+        tmp_file = f'{self.textfile}.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as file:
+            file.write(self.render())
+        os.replace(tmp_file, self.textfile)
+
+    def _write_loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except Exception:  # pylint: disable=broad-except
+                self.__logger.exception("Cannot write %s", self.textfile)
+
+    def start(self):
+        """Start writing and serving the metrics"""
+        if self.textfile:
+            self._threads.append(threading.Thread(
+                target=self._write_loop, daemon=True))
+        if self.port:
+            exporter = self
+
+            class Handler(server.BaseHTTPRequestHandler):
+                # pylint: disable=missing-docstring,invalid-name
+                def do_GET(self):
+                    body = exporter.render().encode('utf-8')
+                    self.send_response(200)
+                    self.send_header(
+                        'Content-Type',
+                        'application/openmetrics-text; version=1.0.0; '
+                        'charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args):
+                    # pylint: disable=arguments-differ
+                    pass
+
+            self._server = server.ThreadingHTTPServer(
+                ('', self.port), Handler)
+            self._threads.append(threading.Thread(
+                target=self._server.serve_forever, daemon=True))
+            self.__logger.info("Serving metrics on port %d", self.port)
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """Stop the threads and write the final metrics"""
+        self._stop.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+        for thread in self._threads:
+            thread.join()
+        if self.textfile:
+            self.write()
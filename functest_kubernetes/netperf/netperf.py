@@ -11,6 +11,7 @@
 Benchmarking Kubernetes Networking Performance
 """
 
+import fnmatch
 import glob
 import logging
 import os
@@ -21,14 +22,68 @@ import time
 
 from kubernetes import client
 from kubernetes import config
+import numpy
+import prettytable
 from xtesting.core import testcase
 
+from functest_kubernetes import pool
+
+# two-sided 95% quantiles of Student's t distribution (1 to 30 dof)
+T_95 = (
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042)
+
+
+def load_results(paths):
+    """Load the maximum throughputs (Mbit/s) of all netperf CSV files
+
+    It returns the scenario labels and the throughputs as two arrays (one
+    item per scenario and per iteration).
+    """
+    labels = []
+    values = []
+    for path in paths:
+        data = numpy.genfromtxt(
+            path, delimiter=',', dtype=str, skip_header=1, usecols=(0, 1),
+            autostrip=True, invalid_raise=False, ndmin=2)
+        labels.append(data[:, 0])
+        values.append(data[:, 1].astype(float))
+    if not labels:
+        return numpy.array([], dtype=str), numpy.array([])
+    return numpy.concatenate(labels), numpy.concatenate(values)
+
+
+def summarize(labels, values):
+    """Compute the statistics of the throughputs per scenario
+
+    The confidence interval is the 95% one of the mean.
+    """
+    stats = {}
+    scenarios, inverse = numpy.unique(labels, return_inverse=True)
+    for index, scenario in enumerate(scenarios):
+        samples = values[inverse == index]
+        mean = samples.mean()
+        margin = 0.0
+        if len(samples) > 1:
+            margin = T_95[min(len(samples) - 1, len(T_95)) - 1] * samples.std(
+                ddof=1) / numpy.sqrt(len(samples))
+        p5, median, p95 = numpy.percentile(samples, (5, 50, 95))
+        stats[str(scenario)] = {
+            'samples': len(samples), 'mean': float(mean),
+            'median': float(median), 'p5': float(p5), 'p95': float(p95),
+            'ci_low': float(mean - margin), 'ci_high': float(mean + margin)}
+    return stats
+
 
 class Netperf(testcase.TestCase):
     # pylint: disable=too-many-instance-attributes
     """Run Benchmarking Kubernetes Networking Performance"""
 
     ns_generate_name = "netperf-"
+    iterations = 1
+    timeout = 3600
+    min_throughput = {}
     __logger = logging.getLogger(__name__)
 
     def __init__(self, **kwargs):
@@ -38,6 +93,9 @@ class Netperf(testcase.TestCase):
         self.output_log_name = 'functest-kubernetes.log'
         self.output_debug_log_name = 'functest-kubernetes.debug.log'
         self.namespace = ''
+        self.pool = pool.get_pool(
+            self.ns_generate_name,
+            {"pod-security.kubernetes.io/enforce": "baseline"})
 
     def check_requirements(self):
         """Check if launch is in $PATH"""
@@ -52,29 +110,28 @@ class Netperf(testcase.TestCase):
             if not os.path.exists(self.res_dir):
                 os.makedirs(self.res_dir)
             os.chdir(self.res_dir)
-            api_response = self.corev1.create_namespace(
-                client.V1Namespace(metadata=client.V1ObjectMeta(
-                    generate_name=self.ns_generate_name,
-                    labels={
-                        "pod-security.kubernetes.io/enforce": "baseline"})))
-            self.namespace = api_response.metadata.name
-            self.__logger.debug("create_namespace: %s", api_response)
-            cmd = ['launch', '-iterations', '1', '-kubeConfig',
+            self.namespace = self.pool.acquire()
+            iterations = kwargs.get('iterations', self.iterations)
+            cmd = ['launch', '-iterations', str(iterations), '-kubeConfig',
                    f'{Path.home()}/.kube/config', '-v', '3',
                    '-namespace', self.namespace]
             output = subprocess.check_output(
-                cmd, stderr=subprocess.STDOUT, timeout=3600)
+                cmd, stderr=subprocess.STDOUT,
+                timeout=self.timeout * iterations)
             self.__logger.info("%s\n%s", " ".join(cmd), output.decode("utf-8"))
             lfiles = glob.glob(os.path.join(
                 f'results_{self.namespace}-latest',
                 f'{self.namespace}-latest*.csv'))
+            self.details['scenarios'] = summarize(*load_results(lfiles))
+            self.details['iterations'] = iterations
             results = max(lfiles, key=os.path.getmtime)
             cmd = ['plotperf', '-c', results,
                    '-o', self.res_dir, '-s', 'netperf']
             output = subprocess.check_output(
                 cmd, stderr=subprocess.STDOUT, timeout=60)
             self.__logger.info("%s\n%s", " ".join(cmd), output.decode("utf-8"))
-            self.result = 100
+            self.result = 100 if self.check_criteria(kwargs.get(
+                'min_throughput', self.min_throughput)) else 0
             status = testcase.TestCase.EX_OK
         except (subprocess.TimeoutExpired,
                 subprocess.CalledProcessError) as exc:
@@ -83,13 +140,44 @@ class Netperf(testcase.TestCase):
                 exc.output.decode("utf-8"))
             self.result = 0
             status = testcase.TestCase.EX_RUN_ERROR
+        except ValueError:
+            self.__logger.exception("Cannot load the netperf results")
+            self.result = 0
+            status = testcase.TestCase.EX_RUN_ERROR
         self.stop_time = time.time()
         return status
 
+    def check_criteria(self, min_throughput):
+        """Check the median throughputs and print the statistics
+
+        min_throughput gives the minimum median throughputs (Mbit/s) per
+        scenario pattern (e.g. "*iperf TCP*").
+        """
+        scenarios = self.details['scenarios']
+        msg = prettytable.PrettyTable(
+            header_style='upper', padding_width=5,
+            field_names=['scenario', 'samples', 'mean', 'median', 'p5',
+                         'p95', '95% ci'])
+        for scenario, stats in sorted(scenarios.items()):
+            msg.add_row([
+                scenario, stats['samples'], f"{stats['mean']:.1f}",
+                f"{stats['median']:.1f}", f"{stats['p5']:.1f}",
+                f"{stats['p95']:.1f}",
+                f"{stats['ci_low']:.1f} - {stats['ci_high']:.1f}"])
+        self.__logger.info("Throughputs (Mbit/s):\n\n%s\n", msg.get_string())
+        passed = bool(scenarios)
+        for pattern, minimum in min_throughput.items():
+            matched = fnmatch.filter(scenarios, pattern)
+            if not matched:
+                self.__logger.error("No scenario matches %s", pattern)
+                passed = False
+            for scenario in matched:
+                if scenarios[scenario]['median'] < minimum:
+                    self.__logger.error(
+                        "%s: %.1f Mbit/s < %s Mbit/s", scenario,
+                        scenarios[scenario]['median'], minimum)
+                    passed = False
+        return passed
+
     def clean(self):
-        if self.namespace:
-            try:
-                self.corev1.delete_namespace(self.namespace)
-                self.__logger.debug("delete_namespace: %s", self.namespace)
-            except client.rest.ApiException:
-                pass
+        self.pool.release(self.namespace)
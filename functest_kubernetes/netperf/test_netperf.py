@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2021 Orange and others.
+#
+# All rights reserved. This program and the accompanying materials
+# are made available under the terms of the Apache License, Version 2.0
+# which accompanies this distribution, and is available at
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Define the classes required to fully cover netperf."""
+
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from functest_kubernetes.netperf import netperf
+
+CSV = """MSS                                          , Maximum, 96, 352,
+1 iperf TCP. Same VM using Pod IP            ,{},{},{},
+2 iperf TCP. Same VM using Virtual IP        ,{},{},{},
+11 iperf UDP. Same VM using Pod IP           ,{},
+"""
+
+
+class StatisticsTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.paths = []
+        for index, values in enumerate((
+                (100, 90, 100, 200, 180, 200, 50),
+                (110, 99, 110, 220, 198, 220, 60),
+                (120, 108, 120, 240, 216, 240, 70))):
+            self.paths.append(os.path.join(self.tmp_dir, f'{index}.csv'))
+            with open(self.paths[-1], 'w', encoding='utf-8') as csv:
+                csv.write(CSV.format(*values))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_load_results(self):
+        labels, values = netperf.load_results(self.paths[:1])
+        self.assertEqual(list(labels), [
+            '1 iperf TCP. Same VM using Pod IP',
+            '2 iperf TCP. Same VM using Virtual IP',
+            '11 iperf UDP. Same VM using Pod IP'])
+        self.assertEqual(list(values), [100, 200, 50])
+
+    def test_summarize(self):
+        stats = netperf.summarize(*netperf.load_results(self.paths))
+        tcp = stats['1 iperf TCP. Same VM using Pod IP']
+        self.assertEqual(tcp['samples'], 3)
+        self.assertAlmostEqual(tcp['mean'], 110)
+        self.assertAlmostEqual(tcp['median'], 110)
+        self.assertAlmostEqual(tcp['p5'], 101)
+        self.assertAlmostEqual(tcp['p95'], 119)
+        self.assertAlmostEqual(tcp['ci_low'], 110 - 4.303 * 10 / 3 ** 0.5)
+        self.assertAlmostEqual(tcp['ci_high'], 110 + 4.303 * 10 / 3 ** 0.5)
+
+    def test_single(self):
+        stats = netperf.summarize(*netperf.load_results(self.paths[:1]))
+        udp = stats['11 iperf UDP. Same VM using Pod IP']
+        self.assertEqual((udp['ci_low'], udp['ci_high']), (50, 50))
+
+    def test_empty(self):
+        self.assertEqual(netperf.summarize(*netperf.load_results([])), {})
+
+    def test_malformed(self):
+        with open(self.paths[0], 'w', encoding='utf-8') as csv:
+            csv.write(CSV.format('n/a', 90, 100, 200, 180, 200, 50))
+        with self.assertRaises(ValueError):
+            netperf.load_results(self.paths[:1])
+
+
+class NetperfTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    @mock.patch('functest_kubernetes.pool.get_pool')
+    @mock.patch('kubernetes.config.load_kube_config')
+    def setUp(self, *args):
+        self.netperf = netperf.Netperf(case_name='netperf')
+        self.netperf.details['scenarios'] = {
+            '1 iperf TCP. Same VM using Pod IP': {
+                'samples': 3, 'mean': 110, 'median': 110, 'p5': 101,
+                'p95': 119, 'ci_low': 85, 'ci_high': 135},
+            '11 iperf UDP. Same VM using Pod IP': {
+                'samples': 3, 'mean': 60, 'median': 60, 'p5': 51,
+                'p95': 69, 'ci_low': 35, 'ci_high': 85}}
+        args[0].assert_called_once_with()
+
+    def test_no_criteria(self):
+        self.assertTrue(self.netperf.check_criteria({}))
+
+    def test_criteria(self):
+        self.assertTrue(self.netperf.check_criteria(
+            {'*iperf TCP*': 100, '*UDP*': 50}))
+        self.assertFalse(self.netperf.check_criteria({'*iperf TCP*': 111}))
+
+    def test_unmatched(self):
+        self.assertFalse(self.netperf.check_criteria({'*netperf*': 1}))
+
+    def test_no_results(self):
+        self.netperf.details['scenarios'] = {}
+        self.assertFalse(self.netperf.check_criteria({}))
+
+    @mock.patch('functest_kubernetes.netperf.netperf.load_results',
+                side_effect=ValueError('could not convert'))
+    @mock.patch('glob.glob', return_value=['0.csv'])
+    @mock.patch('subprocess.check_output', return_value=b'')
+    @mock.patch('os.chdir')
+    @mock.patch('os.path.exists', return_value=True)
+    def test_malformed(self, *args):
+        self.netperf.pool.acquire.return_value = 'netperf-0'
+        self.assertEqual(
+            self.netperf.run(), netperf.testcase.TestCase.EX_RUN_ERROR)
+        self.assertEqual(self.netperf.result, 0)
+        args[2].assert_called_once()
+        args[4].assert_called_once_with(['0.csv'])
+
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    unittest.main(verbosity=2)
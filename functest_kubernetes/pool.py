@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2020 Orange and others.
+#
+# All rights reserved. This program and the accompanying materials
+# are made available under the terms of the Apache License, Version 2.0
+# which accompanies this distribution, and is available at
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+Pre-create the test namespaces and tear them down in the background.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from kubernetes import client
+
+POOL_LABEL = "functest-kubernetes/pool"
+
+
+class Reaper():
+    """Delete the namespaces released off the critical path
+
+    The namespaces are deleted as soon as they are released and their
+    finalization is confirmed by polling them until they are gone.
+    """
+
+    __logger = logging.getLogger(__name__)
+
+    poll_interval = 2
+    finalize_timeout = 600
+    propagation_policy = "Foreground"
+
+    def __init__(self, corev1=None):
+        self.corev1 = corev1
+        self.terminating = {}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def put(self, namespace):
+        """Delete the namespace in the background"""
+        with self._lock:
+            if not self._thread:
+                self.corev1 = self.corev1 or client.CoreV1Api()
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._queue.put(namespace)
+
+    def delete(self, namespace):
+        """Delete the namespace and its objects"""
+        try:
+            self.corev1.delete_namespace(
+                namespace, propagation_policy=self.propagation_policy)
+            self.__logger.debug("delete_namespace: %s", namespace)
+        except client.rest.ApiException as exc:
+            if exc.status != 404:
+                self.__logger.warning(
+                    "Cannot delete %s: %s", namespace, exc.reason)
+                return
+        self.terminating[namespace] = time.time()
+
+    def confirm(self):
+        """Forget the namespaces which are finalized or stuck"""
+        for namespace, start in list(self.terminating.items()):
+            try:
+                self.corev1.read_namespace(namespace)
+            except client.rest.ApiException as exc:
+                if exc.status != 404:
+                    continue
+                self.__logger.debug(
+                    "%s finalized in %0.2f sec", namespace,
+                    time.time() - start)
+                del self.terminating[namespace]
+                continue
+            if time.time() - start > self.finalize_timeout:
+                self.__logger.warning(
+                    "%s is not finalized after %d sec", namespace,
+                    self.finalize_timeout)
+                del self.terminating[namespace]
+
+    def _run(self):
+        while True:
+            try:
+                namespace = self._queue.get(
+                    timeout=self.poll_interval if self.terminating else None)
+            except queue.Empty:
+                self.confirm()
+                continue
+            try:
+                self.delete(namespace)
+            finally:
+                self._queue.task_done()
+
+    def join(self):
+        """Wait for all deletions to be requested"""
+        if self._thread:
+            self._queue.join()
+
+
+class Pool():
+    # pylint: disable=too-many-instance-attributes
+    """Hand out namespaces created ahead of time
+
+    The namespaces are labelled (e.g. with their Pod Security Standards
+    level) and populated with the configmaps returned by config_maps
+    before being acquired. size spare namespaces are created in the
+    background after every acquisition. The pool is disabled by default
+    (size is 0) as most runs only acquire one namespace of each kind.
+    """
+
+    __logger = logging.getLogger(__name__)
+
+    size = int(os.getenv("NAMESPACE_POOL_SIZE", "0"))
+
+    def __init__(self, generate_name, labels, config_maps=None, reaper=None):
+        self.generate_name = generate_name
+        self.labels = dict(labels, **{POOL_LABEL: generate_name.strip('-')})
+        self.config_maps = config_maps
+        self.reaper = reaper or REAPER
+        self.corev1 = None
+        self._spares = queue.Queue()
+        self._lock = threading.Lock()
+        self._filling = 0
+        self._threads = []
+
+    def create(self):
+        """Create a namespace and its configmaps"""
+        api_response = self.corev1.create_namespace(
+            client.V1Namespace(metadata=client.V1ObjectMeta(
+                generate_name=self.generate_name, labels=self.labels)))
+        namespace = api_response.metadata.name
+        self.__logger.debug("create_namespace: %s", api_response)
+        try:
+            for name, data in (
+                    self.config_maps(namespace)
+                    if self.config_maps else {}).items():
+                api_response = self.corev1.create_namespaced_config_map(
+                    namespace, body=client.V1ConfigMap(
+                        metadata=client.V1ObjectMeta(
+                            name=name, namespace=namespace),
+                        data=data))
+                self.__logger.debug(
+                    "create_namespaced_config_map: %s", api_response)
+        except client.rest.ApiException:
+            self.reaper.put(namespace)
+            raise
+        return namespace
+
+    def _fill(self):
+        try:
+            namespace = self.create()
+            self._spares.put(namespace)
+            self.__logger.debug("%s is ready to be acquired", namespace)
+        except Exception:  # pylint: disable=broad-except
+            self.__logger.exception("Cannot create a spare namespace")
+        finally:
+            with self._lock:
+                self._filling -= 1
+
+    def fill(self):
+        """Create the missing spare namespaces in the background"""
+        with self._lock:
+            missing = self.size - self._spares.qsize() - self._filling
+            self._filling += max(0, missing)
+        for _ in range(missing):
+            thread = threading.Thread(target=self._fill, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def acquire(self):
+        """Return a spare namespace (or create one if none is left)"""
+        self.corev1 = self.corev1 or client.CoreV1Api()
+        try:
+            namespace = self._spares.get_nowait()
+            self.__logger.info("%s acquired from the pool", namespace)
+        except queue.Empty:
+            namespace = self.create()
+        self.fill()
+        return namespace
+
+    def release(self, namespace):
+        """Hand the namespace to the reaper"""
+        if namespace:
+            self.reaper.put(namespace)
+
+    def close(self):
+        """Release the spare namespaces (once created)"""
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        while True:
+            try:
+                self.release(self._spares.get_nowait())
+            except queue.Empty:
+                break
+
+
+REAPER = Reaper()
+POOLS = {}
+
+
+def get_pool(generate_name, labels, config_maps=None):
+    """Return the pool shared by the testcases creating such namespaces"""
+    key = (generate_name, tuple(sorted(labels.items())))
+    if key not in POOLS:
+        POOLS[key] = Pool(generate_name, labels, config_maps=config_maps)
+    return POOLS[key]
+
+
+@atexit.register
+def close_pools():
+    """Release all spare namespaces and request all deletions"""
+    for pool in POOLS.values():
+        pool.close()
+    REAPER.join()
@@ -11,8 +11,6 @@ import logging
 import os
 import time
 
-from jinja2 import Template
-import pkg_resources
 from rally import api
 from rally import exceptions
 from rally.common import yamlutils as yaml
@@ -21,6 +19,8 @@ from rally.env import env_mgr
 
 from xtesting.core import testcase
 
+from functest_kubernetes import manifest
+
 
 class RallyKubernetes(testcase.TestCase):
     # pylint: disable=too-many-instance-attributes
@@ -64,18 +64,15 @@ class RallyKubernetes(testcase.TestCase):
                 "Cannot check env heath: %s",
                 result['existing@kubernetes']['message'])
             return
-        with open(pkg_resources.resource_filename(
-                'functest_kubernetes', 'rally/all-in-one.yaml'),
-                encoding='utf-8') as file:
-            template = Template(file.read())
-        task = yaml.safe_load(template.render(
+        task = manifest.render(
+            'rally/all-in-one.yaml', loader=yaml.safe_load,
             concurrency=kwargs.get("concurrency", self.concurrency),
             times=kwargs.get("times", self.times),
             namespaces_count=kwargs.get(
                 "namespaces_count", self.namespaces_count),
             dockerhub_repo=os.getenv("DOCKERHUB_REPO", self.dockerhub_repo),
             gcr_repo=os.getenv("GCR_REPO", self.gcr_repo),
-            k8s_gcr_repo=os.getenv("K8S_GCR_REPO", self.k8s_gcr_repo)))
+            k8s_gcr_repo=os.getenv("K8S_GCR_REPO", self.k8s_gcr_repo))
         rapi.task.validate(deployment='my-kubernetes', config=task)
         task_instance = rapi.task.create(deployment='my-kubernetes')
         rapi.task.start(
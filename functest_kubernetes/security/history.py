@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2020 Orange and others.
+#
+# All rights reserved. This program and the accompanying materials
+# are made available under the terms of the Apache License, Version 2.0
+# which accompanies this distribution, and is available at
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+Keep the security findings of all runs in a local SQLite database.
+"""
+
+import contextlib
+import logging
+import os
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    cluster TEXT NOT NULL,
+    case_name TEXT NOT NULL,
+    start_time REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS runs_cluster
+    ON runs (cluster, case_name, id);
+CREATE TABLE IF NOT EXISTS findings (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    cluster TEXT NOT NULL,
+    control TEXT NOT NULL,
+    node TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    description TEXT,
+    PRIMARY KEY (run_id, control, node, severity)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS findings_control
+    ON findings (cluster, control, node, severity);
+"""
+
+DIFF = """
+SELECT control, node, severity, description FROM findings
+WHERE run_id = ? AND (control, node, severity) NOT IN (
+    SELECT control, node, severity FROM findings WHERE run_id = ?)
+ORDER BY control, node, severity
+"""
+
+FIELDS = ('control', 'node', 'severity', 'description')
+
+
+class History():
+    """Store the findings per run and compare them to the previous run
+
+    The findings are keyed by cluster, control ID, node and severity
+    (the node is empty if it doesn't apply). Both tables are indexed by
+    cluster to answer over months of runs.
+    """
+
+    __logger = logging.getLogger(__name__)
+
+    def __init__(self, path):
+        self.path = path
+
+    @contextlib.contextmanager
+    def connect(self):
+        """Open the database (created if missing) in a transaction"""
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            connection.execute("PRAGMA foreign_keys = ON")
+            connection.executescript(SCHEMA)
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _diff(connection, run_id, other_id):
+        return [dict(zip(FIELDS, row)) for row in connection.execute(
+            DIFF, (run_id, other_id))]
+
+    def record(self, cluster, case_name, findings, start_time=None):
+        """Store the findings of a new run
+
+        It returns the findings which are new and the ones which are
+        resolved when compared to the previous run of the same test case
+        on the same cluster (all findings are new the first time).
+        """
+        with self.connect() as connection:
+            row = connection.execute(
+                "SELECT max(id) FROM runs WHERE cluster = ? AND "
+                "case_name = ?", (cluster, case_name)).fetchone()
+            previous = row[0] if row else None
+            run_id = connection.execute(
+                "INSERT INTO runs (cluster, case_name, start_time) "
+                "VALUES (?, ?, ?)", (
+                    cluster, case_name, start_time or time.time())).lastrowid
+            connection.executemany(
+                "INSERT OR IGNORE INTO findings VALUES (?, ?, ?, ?, ?, ?)",
+                [(run_id, cluster, finding['control'],
+                  finding.get('node') or '', finding['severity'],
+                  finding.get('description')) for finding in findings])
+            new = self._diff(connection, run_id, previous)
+            resolved = (
+                self._diff(connection, previous, run_id)
+                if previous else [])
+        self.__logger.debug(
+            "Run %d of %s on %s recorded in %s", run_id, case_name, cluster,
+            self.path)
+        return new, resolved
+
+    def runs(self, cluster, control, node=''):
+        """Return the start times of the runs raising the finding"""
+        with self.connect() as connection:
+            return [row[0] for row in connection.execute(
+                "SELECT runs.start_time FROM findings JOIN runs ON "
+                "runs.id = findings.run_id WHERE findings.cluster = ? AND "
+                "control = ? AND node = ? ORDER BY runs.id",
+                (cluster, control, node))]
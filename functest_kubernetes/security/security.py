@@ -13,23 +13,86 @@ Define the parent for Kubernetes testing.
 
 from __future__ import division
 
-import ast
+import codecs
+import functools
 import json
 import logging
 import os
+import sqlite3
 import time
 import textwrap
-import yaml
 
-from jinja2 import Template
 from kubernetes import client
 from kubernetes import config
-from kubernetes import watch
-import pkg_resources
 import prettytable
 
 from xtesting.core import testcase
 
+from functest_kubernetes import job
+from functest_kubernetes import manifest
+from functest_kubernetes import pool
+from functest_kubernetes.security import history
+
+
+class JSONStream():
+    """Decode the JSON documents of a stream as it arrives
+
+    The lines which don't belong to JSON documents (e.g. logs) are
+    skipped. Only the document being received is buffered (up to
+    max_size characters).
+    """
+
+    max_size = 64 * 1024 * 1024
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder('utf-8')(
+            errors='replace')
+        self._json = json.JSONDecoder()
+        self._line = ''
+        self._document = []
+        self._size = 0
+
+    def feed(self, data):
+        """Decode the next chunk and return the documents completed"""
+        lines = (self._line + self._decoder.decode(data)).split('\n')
+        self._line = lines.pop()
+        if len(self._line) + self._size > self.max_size:
+            self._reset()
+            self._line = ''
+        return [document for document in map(self._parse_line, lines)
+                if document is not None]
+
+    def close(self):
+        """Decode the last line if it's not ended by a newline"""
+        line, self._line = self._line, ''
+        return [document for document in [self._parse_line(line)]
+                if document is not None]
+
+    def _reset(self):
+        self._document = []
+        self._size = 0
+
+    def _parse_line(self, line):
+        if not self._document and not line.lstrip().startswith(('{', '[')):
+            return None
+        self._document.append(line)
+        self._size += len(line)
+        if self._size > self.max_size:
+            self._reset()
+            return None
+        # the pretty-printed documents are only decoded once closed
+        if len(self._document) > 1 and not line.startswith(('}', ']')):
+            return None
+        text = '\n'.join(self._document).strip()
+        try:
+            document, _ = self._json.raw_decode(text)
+        except json.JSONDecodeError as exc:
+            if exc.pos < len(text):
+                self._reset()
+            return None
+        self._reset()
+        return document
+
 
 class SecurityTesting(testcase.TestCase):
     # pylint: disable=too-many-instance-attributes
@@ -45,55 +108,123 @@ class SecurityTesting(testcase.TestCase):
         self.corev1 = client.CoreV1Api()
         self.batchv1 = client.BatchV1Api()
         self.pod = None
-        self.pod_log = ""
         self.job_name = None
         self.output_log_name = 'functest-kubernetes.log'
         self.output_debug_log_name = 'functest-kubernetes.debug.log'
         self.namespace = ""
         self.ns_generate_name = "security-"
         self.pss = "baseline"
+        self.pool = None
+        self.history = history.History(os.getenv(
+            "SECURITY_HISTORY", os.path.join(
+                self.dir_results, "security.sqlite")))
+
+    def render_job(self, name, **kwargs):
+        """Render the job manifest security/name.yaml"""
+        return manifest.render(
+            f"security/{name}.yaml", dockerhub_repo=os.getenv(
+                "DOCKERHUB_REPO", self.dockerhub_repo), **kwargs)
+
+    def deploy_jobs(self, bodies):
+        """Run Security jobs concurrently
+
+        It applies all jobs at once in a dedicated namespace and waits for
+        all of them. It returns their outcomes indexed by job name (see
+        job.JobRunner).
+        """
+        self.pool = pool.get_pool(
+            self.ns_generate_name,
+            {"pod-security.kubernetes.io/enforce": self.pss})
+        self.namespace = self.pool.acquire()
+        manifest.Applier().apply(bodies, self.namespace)
+        return job.JobRunner(
+            self.batchv1, self.corev1, self.namespace,
+            [body['metadata']['name'] for body in bodies]).wait(
+                self.watch_timeout)
+
+    def follow_log(self, pod, log_name, callback):
+        """Stream the pod log into log_name and decode it as it arrives
+
+        callback is called with every JSON document printed.
+        """
+        if not os.path.exists(self.res_dir):
+            os.makedirs(self.res_dir)
+        parser = JSONStream()
+        api_response = self.corev1.read_namespaced_pod_log(
+            name=pod, namespace=self.namespace, _preload_content=False)
+        with open(os.path.join(self.res_dir, log_name), 'wb') as log:
+            try:
+                for chunk in api_response.stream(65536):
+                    log.write(chunk)
+                    for document in parser.feed(chunk):
+                        callback(document)
+            finally:
+                api_response.release_conn()
+        for document in parser.close():
+            callback(document)
+        self.__logger.info(
+            "%s log written in %s", pod, os.path.join(self.res_dir, log_name))
+
+    def process_document(self, document):
+        """Keep the last JSON document printed in details"""
+        self.details = document
 
     def deploy_job(self):
         """Run Security job
 
-        It runs a single security job and then simply prints its output asis.
+        It runs a single security job and streams its output in a file.
         """
 
         assert self.job_name
-        api_response = self.corev1.create_namespace(
-            client.V1Namespace(metadata=client.V1ObjectMeta(
-                generate_name=self.ns_generate_name,
-                labels={"pod-security.kubernetes.io/enforce": self.pss})))
-        self.namespace = api_response.metadata.name
-        self.__logger.debug("create_namespace: %s", api_response)
-        with open(pkg_resources.resource_filename(
-                "functest_kubernetes",
-                f"security/{self.job_name}.yaml"),
-                encoding='utf-8') as yfile:
-            template = Template(yfile.read())
-            body = yaml.safe_load(template.render(
-                dockerhub_repo=os.getenv("DOCKERHUB_REPO",
-                                         self.dockerhub_repo)))
-            api_response = self.batchv1.create_namespaced_job(
-                body=body, namespace=self.namespace)
-            self.__logger.info("Job %s created", api_response.metadata.name)
-            self.__logger.debug("create_namespaced_job: %s", api_response)
-        watch_job = watch.Watch()
-        for event in watch_job.stream(
-                func=self.batchv1.list_namespaced_job,
-                namespace=self.namespace, timeout_seconds=self.watch_timeout):
-            if (event["object"].metadata.name == self.job_name and
-                    event["object"].status.succeeded == 1):
-                self.__logger.info(
-                    "%s started in %0.2f sec", event['object'].metadata.name,
-                    time.time()-self.start_time)
-                watch_job.stop()
-        pods = self.corev1.list_namespaced_pod(
-            self.namespace, label_selector=f'job-name={self.job_name}')
-        self.pod = pods.items[0].metadata.name
-        self.pod_log = self.corev1.read_namespaced_pod_log(
-            name=self.pod, namespace=self.namespace)
-        self.__logger.info("\n\n%s", self.pod_log)
+        outcome = self.deploy_jobs(
+            [self.render_job(self.job_name)])[self.job_name]
+        if outcome['status'] != 'succeeded':
+            return
+        self.pod = outcome['pod']
+        self.follow_log(
+            self.pod, f'{self.job_name}.log', self.process_document)
+
+    def cluster_id(self):
+        """Return the uid of kube-system which identifies the cluster"""
+        try:
+            return self.corev1.read_namespace("kube-system").metadata.uid
+        except client.rest.ApiException:
+            return config.list_kube_config_contexts()[1]['context'][
+                'cluster']
+
+    def report_findings(self, findings):
+        """Record the findings and only report the delta
+
+        The new and resolved findings (compared to the previous run on the
+        same cluster) are stored in details.
+        """
+        try:
+            new, resolved = self.history.record(
+                self.cluster_id(), self.case_name, findings,
+                self.start_time)
+        except sqlite3.Error:
+            self.__logger.exception(
+                "Cannot record the findings in %s", self.history.path)
+            return
+        self.details["new_findings"] = new
+        self.details["resolved_findings"] = resolved
+        for title, rows, log in (
+                ('New', new, self.__logger.warning),
+                ('Resolved', resolved, self.__logger.info)):
+            if not rows:
+                continue
+            msg = prettytable.PrettyTable(
+                header_style='upper', padding_width=5,
+                field_names=history.FIELDS)
+            for row in rows:
+                msg.add_row([
+                    row[field] if field != 'description' else textwrap.fill(
+                        row[field] or '', width=50)
+                    for field in history.FIELDS])
+            log("%s findings:\n\n%s\n", title, msg.get_string())
+        self.__logger.info(
+            "%d new and %d resolved findings (%d in total)", len(new),
+            len(resolved), len(findings))
 
     def run(self, **kwargs):
         assert self.job_name
@@ -105,27 +236,12 @@ class SecurityTesting(testcase.TestCase):
         self.stop_time = time.time()
 
     def clean(self):
-        if self.pod:
-            try:
-                api_response = self.corev1.delete_namespaced_pod(
-                    name=self.pod, namespace=self.namespace)
-                self.__logger.debug("delete_namespaced_pod: %s", api_response)
-            except client.rest.ApiException:
-                pass
-        if self.job_name:
-            try:
-                api_response = self.batchv1.delete_namespaced_job(
-                    name=self.job_name, namespace=self.namespace)
-                self.__logger.debug(
-                    "delete_namespaced_deployment: %s", api_response)
-            except client.rest.ApiException:
-                pass
-        if self.namespace:
-            try:
-                api_response = self.corev1.delete_namespace(self.namespace)
-                self.__logger.debug("delete_namespace: %s", self.namespace)
-            except client.rest.ApiException:
-                pass
+        """Release the namespace
+
+        The namespace and all its objects are deleted in the background.
+        """
+        if self.pool:
+            self.pool.release(self.namespace)
 
 
 class KubeHunter(SecurityTesting):
@@ -143,7 +259,6 @@ class KubeHunter(SecurityTesting):
 
     def process_results(self, **kwargs):
         """Process kube-hunter details"""
-        self.details = json.loads(self.pod_log.splitlines()[-1])
         if self.details["vulnerabilities"]:
             self.result = 100
             msg = prettytable.PrettyTable(
@@ -167,7 +282,14 @@ class KubeHunter(SecurityTesting):
                 msg.add_row(
                     [vulnerability["category"], vulnerability["vulnerability"],
                      vulnerability["severity"]])
-            self.__logger.warning("\n\n%s\n", msg.get_string())
+            self.__logger.debug("\n\n%s\n", msg.get_string())
+        self.report_findings([{
+            'control': vulnerability.get("vid") or vulnerability[
+                "vulnerability"],
+            'node': vulnerability.get("location"),
+            'severity': vulnerability["severity"],
+            'description': vulnerability["vulnerability"]}
+            for vulnerability in self.details["vulnerabilities"]])
         if self.details["hunter_statistics"]:
             msg = prettytable.PrettyTable(
                 header_style='upper', padding_width=5,
@@ -203,24 +325,125 @@ class KubeBench(SecurityTesting):
         self.job_name = "kube-bench"
         self.ns_generate_name = "kube-bench-"
         self.pss = "privileged"
+        self.control_plane_labels = (
+            "node-role.kubernetes.io/control-plane",
+            "node-role.kubernetes.io/master")
+
+    @staticmethod
+    def schedulable(node):
+        """Check if the node is Ready and not cordoned"""
+        return not node.spec.unschedulable and any(
+            condition.type == 'Ready' and condition.status == 'True'
+            for condition in node.status.conditions or [])
+
+    def render_jobs(self, targets):
+        """Render the jobs checking the targets
+
+        The node checks run on every Ready and schedulable node (one job
+        per node) when the other checks run on the control plane. The
+        control plane targets are skipped if no such node matches the
+        job affinity (e.g. managed clusters). It returns the jobs indexed
+        by target.
+        """
+        nodes = [node for node in self.corev1.list_node().items
+                 if self.schedulable(node)]
+        control_plane = any(
+            label in (node.metadata.labels or {}) for node in nodes
+            for label in self.control_plane_labels)
+        jobs = {}
+        for target in targets:
+            if target == 'node':
+                jobs[target] = [
+                    self.render_job(
+                        'kube-bench-node', index=index,
+                        node=node.metadata.name)
+                    for index, node in enumerate(nodes)]
+            elif control_plane:
+                jobs[target] = [
+                    self.render_job('kube-bench-master', target=target)]
+            else:
+                self.__logger.warning(
+                    "%s is skipped as no control plane node is schedulable",
+                    target)
+        return jobs
+
+    def merge_report(self, report, node):
+        """Merge the report of one job in details
+
+        Only the test counters are kept per node. The scored failures are
+        indexed by test number with the nodes failing them.
+        """
+        failures = self.details["report"]["failures"]
+        for details in report.get("Controls", []):
+            tests = []
+            for test in details.get('tests', []):
+                tests.append({key: test.get(key) for key in (
+                    'section', 'desc', 'pass', 'fail', 'warn')})
+                for result in test.get("results", []):
+                    if result.get('scored') and result.get('status') == 'FAIL':
+                        failures.setdefault(result['test_number'], {
+                            'test_desc': result.get('test_desc'),
+                            'remediation': result.get('remediation'),
+                            'nodes': []})['nodes'].append(node)
+            self.details["report"]["Controls"].append({
+                'node': node, 'id': details.get('id'),
+                'node_type': details.get('node_type'),
+                'version': details.get('version'), 'tests': tests})
+        totals = self.details["report"]["Totals"]
+        for key, value in report.get("Totals", {}).items():
+            totals[key] = totals.get(key, 0) + value
 
     def run(self, **kwargs):
-        self.job_name = f'kube-bench-{kwargs.get("target", "node")}'
-        super().run(**kwargs)
-        self.details["report"] = ast.literal_eval(self.pod_log)
+        targets = kwargs.get("targets", [kwargs.get("target", "node")])
+        self.start_time = time.time()
+        self.details["report"] = {"Controls": [], "Totals": {}, "failures": {}}
+        try:
+            jobs = self.render_jobs(targets)
+            self.details["jobs"] = self.deploy_jobs(
+                [body for bodies in jobs.values() for body in bodies])
+            for name, outcome in sorted(self.details["jobs"].items()):
+                if outcome['status'] == 'succeeded':
+                    self.follow_log(
+                        outcome['pod'], f'{name}.log', functools.partial(
+                            self.merge_report, node=outcome['node']))
+        except client.rest.ApiException:
+            self.__logger.exception("Cannot run %s", ", ".join(targets))
+            self.stop_time = time.time()
+            return
         msg = prettytable.PrettyTable(
             header_style='upper', padding_width=5,
-            field_names=['node_type', 'version', 'test_desc', 'pass',
+            field_names=['node', 'node_type', 'version', 'test_desc', 'pass',
                          'fail', 'warn'])
         for details in self.details["report"]["Controls"]:
             for test in details['tests']:
                 msg.add_row(
-                    [details['node_type'], details['version'], test['desc'],
-                     test['pass'], test['fail'], test['warn']])
-                for result in test["results"]:
-                    if result['scored'] and result['status'] == 'FAIL':
-                        self.__logger.error(
-                            "%s\n%s", result['test_desc'],
-                            result['remediation'])
+                    [details['node'], details['node_type'],
+                     details['version'], test['desc'], test['pass'],
+                     test['fail'], test['warn']])
+        for test_number, failure in sorted(
+                self.details["report"]["failures"].items()):
+            self.__logger.debug(
+                "%s %s (%s)\n%s", test_number, failure['test_desc'],
+                ", ".join(failure['nodes']), failure['remediation'])
+        self.details["targets"] = {target: 'skipped' for target in targets}
+        for target, bodies in jobs.items():
+            self.details["targets"][target] = 'succeeded' if bodies and all(
+                self.details["jobs"][body['metadata']['name']]['status'] ==
+                'succeeded' for body in bodies) else 'failed'
+        completed = 'failed' not in self.details["targets"].values()
+        if completed:
+            self.report_findings([
+                {'control': test_number, 'node': node, 'severity': 'FAIL',
+                 'description': failure['test_desc']}
+                for test_number, failure in self.details["report"][
+                    "failures"].items()
+                for node in failure['nodes']])
+        else:
+            self.__logger.warning(
+                "The findings are not recorded as some checks didn't run")
         self.__logger.warning("Targets:\n\n%s\n", msg.get_string())
-        self.result = 100
+        if jobs:
+            self.result = 100 * sum(
+                status == 'succeeded' for status in self.details[
+                    "targets"].values()) / len(jobs)
+        self.stop_time = time.time()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2020 Orange and others.
+#
+# All rights reserved. This program and the accompanying materials
+# are made available under the terms of the Apache License, Version 2.0
+# which accompanies this distribution, and is available at
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Define the classes required to fully cover history."""
+
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+from functest_kubernetes.security import history
+
+
+def _finding(control, node='', severity='FAIL'):
+    return {'control': control, 'node': node, 'severity': severity,
+            'description': f'{control} desc'}
+
+
+class HistoryTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.history = history.History(
+            os.path.join(self.tmp_dir, 'results', 'security.sqlite'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_first_run(self):
+        new, resolved = self.history.record(
+            'uid', 'kube_bench', [_finding('1.1', 'a'), _finding('1.2', 'a')])
+        self.assertEqual(
+            [finding['control'] for finding in new], ['1.1', '1.2'])
+        self.assertEqual(new[0]['description'], '1.1 desc')
+        self.assertEqual(resolved, [])
+
+    def test_diff(self):
+        self.history.record('uid', 'kube_bench', [
+            _finding('1.1', 'a'), _finding('1.1', 'b'), _finding('1.2', 'a')])
+        new, resolved = self.history.record('uid', 'kube_bench', [
+            _finding('1.1', 'a'), _finding('1.3', 'b')])
+        self.assertEqual(
+            [(finding['control'], finding['node']) for finding in new],
+            [('1.3', 'b')])
+        self.assertEqual(
+            [(finding['control'], finding['node']) for finding in resolved],
+            [('1.1', 'b'), ('1.2', 'a')])
+
+    def test_severity(self):
+        self.history.record(
+            'uid', 'kube_hunter', [_finding('KHV002', 'x', 'low')])
+        new, resolved = self.history.record(
+            'uid', 'kube_hunter', [_finding('KHV002', 'x', 'high')])
+        self.assertEqual(new[0]['severity'], 'high')
+        self.assertEqual(resolved[0]['severity'], 'low')
+
+    def test_isolated(self):
+        self.history.record('uid', 'kube_bench', [_finding('1.1')])
+        self.assertEqual(len(self.history.record(
+            'other', 'kube_bench', [_finding('1.1')])[0]), 1)
+        self.assertEqual(len(self.history.record(
+            'uid', 'kube_hunter', [_finding('1.1')])[0]), 1)
+        self.assertEqual(self.history.record(
+            'uid', 'kube_bench', [_finding('1.1')]), ([], []))
+
+    def test_runs(self):
+        self.history.record('uid', 'kube_bench', [_finding('1.1')], 1)
+        self.history.record('uid', 'kube_bench', [], 2)
+        self.history.record('uid', 'kube_bench', [_finding('1.1')], 3)
+        self.assertEqual(self.history.runs('uid', '1.1'), [1, 3])
+
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    unittest.main(verbosity=2)
@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2020 Orange and others.
+#
+# All rights reserved. This program and the accompanying materials
+# are made available under the terms of the Apache License, Version 2.0
+# which accompanies this distribution, and is available at
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Define the classes required to fully cover security."""
+
+import json
+import logging
+import unittest
+
+import mock
+
+from functest_kubernetes.security import history
+from functest_kubernetes.security import security
+
+
+def _node(name, labels=None, ready='True', unschedulable=None):
+    node = mock.Mock()
+    node.metadata.name = name
+    node.metadata.labels = labels or {}
+    node.spec.unschedulable = unschedulable
+    node.status.conditions = [mock.Mock(type='Ready', status=ready)]
+    return node
+
+
+def _outcome(pod, node, status='succeeded'):
+    return {'status': status, 'pod': pod, 'node': node}
+
+
+class JSONStreamTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    def setUp(self):
+        self.parser = security.JSONStream()
+
+    def test_lines(self):
+        self.assertEqual(self.parser.feed(
+            b'INFO starting\n{"a": [1, '), [])
+        self.assertEqual(self.parser.feed(b'2]}\nINFO done\n'), [
+            {'a': [1, 2]}])
+        self.assertEqual(self.parser.feed(b'{"b": true}'), [])
+        self.assertEqual(self.parser.close(), [{'b': True}])
+
+    def test_pretty(self):
+        self.assertEqual(self.parser.feed(
+            b'{\n  "a": "x\xc3'), [])
+        self.assertEqual(self.parser.feed(
+            b'\xa9",\n  "b": {}\n}\n'), [{'a': 'x\xe9', 'b': {}}])
+
+    def test_invalid(self):
+        self.assertEqual(self.parser.feed(
+            b'{not json}\n{"a": 1}\n'), [{'a': 1}])
+
+    def test_max_size(self):
+        self.parser.max_size = 8
+        self.assertEqual(self.parser.feed(b'{"a": "123456789"}\n'), [])
+        self.assertEqual(self.parser.feed(b'{"a": 1}\n'), [{'a': 1}])
+
+
+def _stream(*chunks):
+    api_response = mock.Mock()
+    api_response.stream.return_value = list(chunks)
+    return api_response
+
+
+class KubeHunterTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    @mock.patch('kubernetes.config.load_kube_config')
+    def setUp(self, *args):
+        self.kube_hunter = security.KubeHunter(case_name='kube_hunter')
+        self.kube_hunter.corev1 = mock.Mock()
+        self.kube_hunter.corev1.read_namespace.return_value.metadata.uid = (
+            'uid')
+        self.kube_hunter.history = mock.Mock()
+        self.kube_hunter.history.record.return_value = ([], [])
+        args[0].assert_called_once_with()
+
+    @mock.patch('os.makedirs')
+    @mock.patch('builtins.open', new_callable=mock.mock_open)
+    @mock.patch('functest_kubernetes.security.security.SecurityTesting.'
+                'deploy_jobs')
+    def test_deploy_job(self, *args):
+        args[0].return_value = {'kube-hunter': _outcome('pod-0', 'a')}
+        self.kube_hunter.corev1.read_namespaced_pod_log.return_value = (
+            _stream(b'INFO hunting\n', b'{"vulnerabilities": []}\n'))
+        self.kube_hunter.deploy_job()
+        self.assertEqual(self.kube_hunter.details, {'vulnerabilities': []})
+        args[1].return_value.write.assert_any_call(b'INFO hunting\n')
+        read_log = self.kube_hunter.corev1.read_namespaced_pod_log
+        read_log.assert_called_once_with(
+            name='pod-0', namespace='', _preload_content=False)
+
+    @mock.patch('functest_kubernetes.security.security.SecurityTesting.'
+                'deploy_jobs')
+    def test_deploy_job_failed(self, *args):
+        args[0].return_value = {
+            'kube-hunter': _outcome('pod-0', 'a', 'failed')}
+        self.kube_hunter.deploy_job()
+        self.kube_hunter.corev1.read_namespaced_pod_log.assert_not_called()
+
+    def test_process_results(self):
+        self.kube_hunter.details = {
+            'vulnerabilities': [{
+                'vid': 'KHV002', 'location': '10.0.0.1:6443',
+                'category': 'Information Disclosure',
+                'vulnerability': 'K8s Version Disclosure',
+                'severity': 'medium'}],
+            'hunter_statistics': []}
+        self.kube_hunter.process_results(severity='high')
+        self.assertEqual(self.kube_hunter.result, 100)
+        self.kube_hunter.history.record.assert_called_once_with(
+            'uid', 'kube_hunter', [{
+                'control': 'KHV002', 'node': '10.0.0.1:6443',
+                'severity': 'medium',
+                'description': 'K8s Version Disclosure'}], 0)
+
+
+class KubeBenchTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    @mock.patch('kubernetes.config.load_kube_config')
+    def setUp(self, *args):
+        self.kube_bench = security.KubeBench(case_name='kube_bench')
+        self.kube_bench.corev1 = mock.Mock()
+        self.kube_bench.corev1.read_namespace.return_value.metadata.uid = (
+            'uid')
+        self.kube_bench.history = history.History(':memory:')
+        self.kube_bench.corev1.list_node.return_value.items = [
+            _node('master', {'node-role.kubernetes.io/control-plane': ''}),
+            _node('worker')]
+        args[0].assert_called_once_with()
+
+    def test_render_jobs(self):
+        jobs = self.kube_bench.render_jobs(['master', 'etcd', 'node'])
+        self.assertEqual(
+            {target: [body['metadata']['name'] for body in bodies]
+             for target, bodies in jobs.items()},
+            {'master': ['kube-bench-master'], 'etcd': ['kube-bench-etcd'],
+             'node': ['kube-bench-node-0', 'kube-bench-node-1']})
+        self.assertEqual(
+            jobs['etcd'][0]['spec']['template']['spec']['containers'][0][
+                'command'],
+            ['kube-bench', 'run', '--targets', 'etcd', '--json'])
+        self.assertEqual(
+            jobs['node'][1]['spec']['template']['spec']['nodeName'],
+            'worker')
+
+    def test_render_unschedulable(self):
+        self.kube_bench.corev1.list_node.return_value.items = [
+            _node('master', {'node-role.kubernetes.io/master': ''},
+                  unschedulable=True),
+            _node('down', ready='Unknown'), _node('worker')]
+        jobs = self.kube_bench.render_jobs(['master', 'node'])
+        self.assertNotIn('master', jobs)
+        self.assertEqual(len(jobs['node']), 1)
+        self.assertEqual(
+            jobs['node'][0]['spec']['template']['spec']['nodeName'],
+            'worker')
+
+    def test_merge_report(self):
+        self.kube_bench.details["report"] = {
+            "Controls": [], "Totals": {}, "failures": {}}
+        report = {
+            "Controls": [{"id": "4", "tests": [{
+                "section": "4.1", "desc": "Files", "pass": 0, "fail": 1,
+                "warn": 0, "results": [{
+                    "test_number": "4.1.1", "test_desc": "Check",
+                    "remediation": "Fix", "scored": True,
+                    "status": "FAIL"}]}]}],
+            "Totals": {"total_pass": 1, "total_fail": 2}}
+        self.kube_bench.merge_report(report, 'master')
+        self.kube_bench.merge_report(report, 'worker')
+        report = self.kube_bench.details["report"]
+        self.assertEqual(
+            [control['node'] for control in report["Controls"]],
+            ['master', 'worker'])
+        self.assertNotIn('results', report["Controls"][0]['tests'][0])
+        self.assertEqual(report["Totals"], {"total_pass": 2, "total_fail": 4})
+        self.assertEqual(report["failures"], {"4.1.1": {
+            "test_desc": "Check", "remediation": "Fix",
+            "nodes": ["master", "worker"]}})
+
+    @mock.patch('os.makedirs')
+    @mock.patch('builtins.open', new_callable=mock.mock_open)
+    @mock.patch('functest_kubernetes.security.security.KubeBench.'
+                'deploy_jobs')
+    def test_run(self, *args):
+        args[0].return_value = {
+            'kube-bench-node-0': _outcome('pod-0', 'a'),
+            'kube-bench-node-1': _outcome('pod-1', 'b')}
+        report = json.dumps({
+            "Controls": [{
+                "node_type": "node", "version": "cis-1.8", "tests": [{
+                    "desc": "Worker Node Configuration Files", "pass": 1,
+                    "fail": 1, "warn": 0, "results": [{
+                        "test_number": "4.1.1", "test_desc": "Check",
+                        "scored": True, "status": "FAIL"}]}]}],
+            "Totals": {"total_pass": 1}}).encode()
+        self.kube_bench.corev1.read_namespaced_pod_log.side_effect = [
+            _stream(report[:10], report[10:]), _stream(report)]
+        self.kube_bench.run(targets=['node'])
+        self.assertEqual(len(args[0].call_args[0][0]), 2)
+        self.assertEqual(
+            [control['node'] for control in
+             self.kube_bench.details["report"]["Controls"]], ['a', 'b'])
+        self.assertEqual(
+            self.kube_bench.details["report"]["Totals"], {"total_pass": 2})
+        self.assertEqual(
+            [(finding['control'], finding['node']) for finding in
+             self.kube_bench.details["new_findings"]],
+            [('4.1.1', 'a'), ('4.1.1', 'b')])
+        self.assertEqual(self.kube_bench.result, 100)
+
+    @mock.patch('os.makedirs')
+    @mock.patch('builtins.open', new_callable=mock.mock_open)
+    @mock.patch('functest_kubernetes.security.security.KubeBench.'
+                'deploy_jobs')
+    def test_run_failed(self, *args):
+        args[0].return_value = {
+            'kube-bench-master': _outcome(None, None, 'failed')}
+        self.kube_bench.run(targets=['master'])
+        self.kube_bench.corev1.read_namespaced_pod_log.assert_not_called()
+        self.assertEqual(self.kube_bench.details["targets"], {
+            'master': 'failed'})
+        self.assertEqual(self.kube_bench.result, 0)
+
+    @mock.patch('functest_kubernetes.security.security.KubeBench.'
+                'deploy_jobs')
+    def test_run_managed(self, *args):
+        self.kube_bench.corev1.list_node.return_value.items = [
+            _node('worker')]
+        args[0].return_value = {'kube-bench-node-0': _outcome('pod-0', 'a')}
+        self.kube_bench.corev1.read_namespaced_pod_log.return_value = (
+            _stream(b'{"Controls": []}'))
+        self.kube_bench.run(targets=['master', 'etcd', 'node'])
+        self.assertEqual(self.kube_bench.details["targets"], {
+            'master': 'skipped', 'etcd': 'skipped', 'node': 'succeeded'})
+        self.assertEqual(self.kube_bench.result, 100)
+
+    @mock.patch('functest_kubernetes.security.security.KubeBench.'
+                'deploy_jobs')
+    def test_run_per_target(self, *args):
+        self.kube_bench.history = mock.Mock()
+        args[0].return_value = {
+            'kube-bench-etcd': _outcome(None, None, 'timeout'),
+            'kube-bench-node-0': _outcome('pod-0', 'a'),
+            'kube-bench-node-1': _outcome('pod-1', 'b')}
+        self.kube_bench.corev1.read_namespaced_pod_log.side_effect = [
+            _stream(b'{"Controls": []}'), _stream(b'{"Controls": []}')]
+        self.kube_bench.run(targets=['etcd', 'node'])
+        self.assertEqual(self.kube_bench.details["targets"], {
+            'etcd': 'failed', 'node': 'succeeded'})
+        self.kube_bench.history.record.assert_not_called()
+        self.assertEqual(self.kube_bench.result, 50)
+
+    @mock.patch('os.makedirs')
+    @mock.patch('builtins.open', new_callable=mock.mock_open)
+    @mock.patch('functest_kubernetes.security.security.KubeBench.'
+                'deploy_jobs')
+    def test_run_partial(self, *args):
+        self.kube_bench.history = mock.Mock()
+        args[0].return_value = {
+            'kube-bench-node-0': _outcome('pod-0', 'a'),
+            'kube-bench-node-1': _outcome(None, None, 'timeout')}
+        self.kube_bench.corev1.read_namespaced_pod_log.return_value = (
+            _stream(json.dumps({"Controls": [{"tests": [{
+                "desc": "Files", "pass": 0, "fail": 1, "warn": 0,
+                "results": [{"test_number": "4.1.1", "scored": True,
+                             "status": "FAIL"}]}]}]}).encode()))
+        self.kube_bench.run(targets=['node'])
+        self.assertIn("4.1.1", self.kube_bench.details["report"]["failures"])
+        self.kube_bench.history.record.assert_not_called()
+        self.assertNotIn("resolved_findings", self.kube_bench.details)
+        self.assertEqual(self.kube_bench.result, 0)
+
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    unittest.main(verbosity=2)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2018 All rights reserved
+# This program and the accompanying materials
+# are made available under the terms of the Apache License, Version 2.0
+# which accompanies this distribution, and is available at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+
+"""Define the classes required to fully cover cache."""
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+from functest_kubernetes import cache
+
+
+class CacheTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = cache.Cache(os.path.join(self.tmp_dir, 'cache'), 150)
+        self.file = os.path.join(self.tmp_dir, 'results.json')
+        with open(self.file, 'w', encoding='utf-8') as file:
+            file.write('x' * 100)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_key(self):
+        self.assertEqual(cache.Cache.key('v1', {'a': 1, 'b': 2}),
+                         cache.Cache.key('v1', {'b': 2, 'a': 1}))
+        self.assertNotEqual(cache.Cache.key('v1'), cache.Cache.key('v2'))
+
+    def test_digest(self):
+        self.assertEqual(
+            cache.digest(self.file, chunk_size=7),
+            hashlib.sha256(b'x' * 100).hexdigest())
+
+    def test_get_put(self):
+        self.assertIsNone(self.cache.get('key'))
+        self.cache.put('key', [self.file])
+        entry = self.cache.get('key')
+        self.assertTrue(os.path.isfile(os.path.join(entry, 'results.json')))
+
+    def test_evict(self):
+        self.cache.put('old', [self.file])
+        os.utime(os.path.join(self.cache.cache_dir, 'old'), (0, 0))
+        self.cache.put('new', [self.file])
+        self.assertIsNone(self.cache.get('old'))
+        self.assertIsNotNone(self.cache.get('new'))
+
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    unittest.main(verbosity=2)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2018 All rights reserved
+# This program and the accompanying materials
+# are made available under the terms of the Apache License, Version 2.0
+# which accompanies this distribution, and is available at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+
+"""Define the classes required to fully cover ginkgo."""
+
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+from functest_kubernetes import ginkgo
+
+
+class OutputParserTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    def setUp(self):
+        self.parser = ginkgo.OutputParser()
+
+    def _feed(self, output):
+        for line in output.splitlines(keepends=True):
+            self.parser.feed(line)
+
+    def test_success(self):
+        self._feed(
+            "Ran 2 of 10 Specs in 1.000 seconds\n"
+            "SUCCESS! -- 2 Passed | 0 Failed | 0 Pending | 8 Skipped\n")
+        self.assertEqual(self.parser.summary, {
+            'status': 'SUCCESS', 'passed': 2, 'failed': 0, 'pending': 0,
+            'skipped': 8})
+        self.assertFalse(self.parser.failures)
+
+    def test_failure(self):
+        self._feed(
+            "Summarizing 1 Failure:\n"
+            "  [FAIL] [sig-node] Pods should work\n"
+            "\n"
+            "Ran 2 of 10 Specs in 1.000 seconds\n"
+            "FAIL! -- 1 Passed | 1 Failed | 0 Pending | 8 Skipped\n")
+        self.assertEqual(self.parser.summary['status'], 'FAIL')
+        self.assertEqual(self.parser.summary['failed'], 1)
+        self.assertEqual(list(self.parser.failures), [
+            "Summarizing 1 Failure:",
+            "  [FAIL] [sig-node] Pods should work", ""])
+
+    def test_progress(self):
+        output = (
+            "Will run 3 of 10 specs\n"
+            "SS•S•\n"
+            "------------------------------\n"
+            "• [FAILED] [1.000 seconds]\n"
+            "[sig-node] Pods should fail\n").encode('utf-8')
+        for index in range(len(output)):
+            self.parser.feed(output[index:index + 1])
+        self.parser.close()
+        self.assertEqual(self.parser.total, 3)
+        self.assertEqual(self.parser.done, 3)
+        self.assertEqual(self.parser.failed, 1)
+        self.assertEqual(self.parser.tail[-1], "[sig-node] Pods should fail")
+
+    def test_no_summary(self):
+        self._feed("".join(f"line {i}\n" for i in range(100)))
+        self.assertIsNone(self.parser.summary)
+        self.assertEqual(len(self.parser.tail), self.parser.max_tail_lines)
+        self.assertEqual(self.parser.tail[-1], "line 99")
+
+
+class ReportTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    junit = """<?xml version="1.0" encoding="UTF-8"?>
+<testsuites tests="4" failures="1">
+  <testsuite name="Kubernetes e2e suite" tests="4">
+    <testcase name="[SynchronizedBeforeSuite]" status="passed" time="1.5">
+    </testcase>
+    <testcase name="[It] [sig-node] Pods should run" status="passed"
+        time="10.5"></testcase>
+    <testcase name="[sig-node] Pods should fail" time="3">
+      <failure type="failed">boom</failure>
+    </testcase>
+    <testcase name="[sig-apps] Jobs should skip" status="skipped" time="0">
+      <skipped message="skipped"></skipped>
+    </testcase>
+  </testsuite>
+</testsuites>
+"""
+
+    def setUp(self):
+        self.res_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.res_dir, 'junit_01.xml'), 'w',
+                  encoding='utf-8') as junit:
+            junit.write(self.junit)
+
+    def tearDown(self):
+        shutil.rmtree(self.res_dir)
+
+    def test_parse_reports(self):
+        results = ginkgo.parse_reports(self.res_dir)
+        self.assertEqual(results.specs, {
+            '[sig-node] Pods should run': ['passed', 10.5],
+            '[sig-node] Pods should fail': ['failed', 3.0]})
+        self.assertEqual(results.failed(), ['[sig-node] Pods should fail'])
+        self.assertEqual(results.counters(), {
+            'status': 'FAIL', 'passed': 1, 'failed': 1, 'pending': 0,
+            'skipped': 1})
+
+    def test_parse_no_report(self):
+        os.remove(os.path.join(self.res_dir, 'junit_01.xml'))
+        self.assertFalse(ginkgo.parse_reports(self.res_dir))
+
+
+class ProfileTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    durations = {
+        '[sig-node] Pods should run': 0.5,
+        '[sig-node] Pods should restart': 70,
+        '[sig-apps] Jobs should complete': 20,
+        'Kubectl should work': 400}
+
+    def test_sig(self):
+        self.assertEqual(ginkgo.sig('[sig-node] Pods should run'), 'sig-node')
+        self.assertEqual(ginkgo.sig('Kubectl should work'), 'unknown')
+
+    def test_histogram(self):
+        self.assertEqual(
+            ginkgo.histogram(self.durations, (1, 10, 60, 300)), {
+                'sig-node': [1, 0, 0, 1, 0],
+                'sig-apps': [0, 0, 1, 0, 0],
+                'unknown': [0, 0, 0, 0, 1]})
+
+    def test_regressions(self):
+        baseline = {
+            '[sig-node] Pods should run': 0.1,
+            '[sig-node] Pods should restart': 30,
+            '[sig-apps] Jobs should complete': 19}
+        self.assertEqual(
+            ginkgo.regressions(self.durations, baseline, 1.5, 5),
+            {'[sig-node] Pods should restart': [30, 70]})
+
+
+class ShardTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    def test_focus(self):
+        regex = ginkgo.focus(['[sig-node] Pods (v1) should run'])
+        self.assertEqual(regex, r'^(?:\[sig-node\] Pods \(v1\) should run)$')
+        self.assertEqual(ginkgo.select(
+            ['[sig-node] Pods (v1) should run',
+             '[sig-node] Pods (v1) should run twice'], regex),
+            ['[sig-node] Pods (v1) should run'])
+
+    def test_focus_suite(self):
+        regex = ginkgo.focus(
+            ['[sig-node] Pods (v1) should run', '[sig-apps] Job'],
+            'Kubernetes e2e suite')
+        self.assertEqual(ginkgo.select(
+            ['Kubernetes e2e suite [sig-node] Pods (v1) should run',
+             'Kubernetes e2e suite [sig-node] Pods (v1) should run twice',
+             'Kubernetes e2e suite [sig-apps] Job',
+             '[sig-apps] Job'], regex),
+            ['Kubernetes e2e suite [sig-node] Pods (v1) should run',
+             'Kubernetes e2e suite [sig-apps] Job', '[sig-apps] Job'])
+
+    def test_select(self):
+        names = ['[sig-node] a [Conformance]', '[sig-node] b [Serial]',
+                 '[sig-apps] c [Conformance]']
+        self.assertEqual(
+            ginkgo.select(names, r'\[sig-node\]', r'\[Serial\]'),
+            ['[sig-node] a [Conformance]'])
+        self.assertEqual(ginkgo.select(names), names)
+
+    def test_balance(self):
+        shards = ginkgo.balance(
+            {'a': 10, 'b': 7, 'c': 6, 'd': 4, 'e': 3}, 2)
+        self.assertEqual(shards, [['a', 'd'], ['b', 'c', 'e']])
+        self.assertEqual(ginkgo.balance({'a': 1}, 3), [['a']])
+
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    unittest.main(verbosity=2)
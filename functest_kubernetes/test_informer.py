@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2020 Orange and others.
+#
+# All rights reserved. This program and the accompanying materials
+# are made available under the terms of the Apache License, Version 2.0
+# which accompanies this distribution, and is available at
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Define the classes required to fully cover informer."""
+
+import logging
+import threading
+import unittest
+
+from kubernetes import client
+import mock
+
+from functest_kubernetes import informer
+
+
+def _obj(name, version, ready=None):
+    obj = mock.Mock()
+    obj.metadata.name = name
+    obj.metadata.resource_version = version
+    obj.ready = ready
+    return obj
+
+
+class InformerTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    def setUp(self):
+        self.list_func = mock.Mock(__name__='list_namespaced_pod')
+        self.list_func.return_value.items = [_obj('a', '1')]
+        self.list_func.return_value.metadata.resource_version = '1'
+        self.informer = informer.Informer(self.list_func, 'ns')
+
+    def tearDown(self):
+        self.informer.stop()
+
+    @mock.patch('functest_kubernetes.informer.watch.Watch')
+    def test_watch(self, *args):
+        resumed = threading.Event()
+        calls = []
+
+        def stream(**kwargs):
+            calls.append(kwargs['resource_version'])
+            if len(calls) == 1:
+                yield {'type': 'MODIFIED', 'object': _obj('a', '2', True)}
+                yield {'type': 'ADDED', 'object': _obj('b', '3', True)}
+                raise client.rest.ApiException(status=410)
+            yield {'type': 'DELETED', 'object': _obj('a', '4')}
+            resumed.set()
+            self.informer.stop()
+
+        args[0].return_value.stream.side_effect = stream
+        self.informer.start()
+        self.assertTrue(resumed.wait(5))
+        self.assertEqual(calls, ['1', '1'])
+        self.assertEqual(self.list_func.call_count, 2)
+        self.list_func.assert_called_with('ns')
+        self.assertIsNone(self.informer.get('a'))
+
+    @mock.patch('functest_kubernetes.informer.watch.Watch')
+    def test_wait_all(self, *args):
+        def stream(**kwargs):
+            del kwargs
+            yield {'type': 'MODIFIED', 'object': _obj('a', '2', True)}
+            yield {'type': 'ADDED', 'object': _obj('b', '3', True)}
+            self.informer.stop()
+
+        args[0].return_value.stream.side_effect = stream
+        ready = []
+        self.informer.start()
+        self.assertEqual(self.informer.wait_all(
+            ['a', 'b'], lambda obj: obj.ready, 5,
+            callback=lambda obj: ready.append(obj.metadata.name)), set())
+        self.assertEqual(sorted(ready), ['a', 'b'])
+
+    @mock.patch('functest_kubernetes.informer.watch.Watch')
+    def test_wait_timeout(self, *args):
+        args[0].return_value.stream.return_value = iter([])
+        self.informer.watch_timeout = 0
+        self.informer.relist()
+        self.assertEqual(self.informer.wait_all(
+            ['a', 'c'], lambda obj: obj.name, 0.1), {'c'})
+        self.assertIsNone(self.informer.wait(lambda obj: False, 0.1))
+        self.assertEqual(
+            self.informer.wait(lambda obj: True, 0.1).metadata.name, 'a')
+
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    unittest.main(verbosity=2)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2020 Orange and others.
+#
+# All rights reserved. This program and the accompanying materials
+# are made available under the terms of the Apache License, Version 2.0
+# which accompanies this distribution, and is available at
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Define the classes required to fully cover job."""
+
+import datetime
+import logging
+import unittest
+
+import mock
+
+from functest_kubernetes import job
+
+
+def _job(name, succeeded=None, conditions=None):
+    obj = mock.Mock()
+    obj.metadata.name = name
+    obj.status.succeeded = succeeded
+    obj.status.conditions = conditions
+    obj.status.start_time = datetime.datetime.fromtimestamp(10)
+    obj.status.completion_time = datetime.datetime.fromtimestamp(25)
+    return obj
+
+
+def _condition(condition_type, reason=None):
+    condition = mock.Mock(
+        type=condition_type, status='True', reason=reason, message='msg')
+    condition.last_transition_time = datetime.datetime.fromtimestamp(20)
+    return condition
+
+
+def _pod(name, job_name, phase='Running', waiting=None):
+    pod = mock.Mock()
+    pod.metadata.name = name
+    pod.metadata.labels = {'job-name': job_name}
+    pod.spec.node_name = 'node'
+    pod.status.phase = phase
+    pod.status.init_container_statuses = None
+    status = mock.Mock()
+    status.state.waiting = None
+    if waiting:
+        status.state.waiting = mock.Mock(reason=waiting, message='msg')
+    pod.status.container_statuses = [status]
+    return pod
+
+
+class JobRunnerTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    def setUp(self):
+        self.runner = job.JobRunner(
+            mock.Mock(), mock.Mock(), 'ns', ['a', 'b'])
+
+    def test_selectors(self):
+        # pylint: disable=protected-access
+        self.assertEqual(self.runner._selectors(), (
+            {}, {'label_selector': 'job-name in (a,b)'}))
+        self.runner.names = ['a']
+        self.assertEqual(self.runner._selectors(), (
+            {'field_selector': 'metadata.name=a'},
+            {'label_selector': 'job-name=a'}))
+
+    def test_succeeded(self):
+        outcome = self.runner.outcome(
+            _job('a', 1, [_condition('Complete')]),
+            [_pod('a-1', 'a', 'Succeeded'), _pod('a-0', 'a', 'Failed')])
+        self.assertEqual(outcome['status'], 'succeeded')
+        self.assertEqual(outcome['pod'], 'a-1')
+        self.assertEqual(outcome['duration'], 15)
+
+    def test_backoff_limit(self):
+        outcome = self.runner.outcome(_job('a', conditions=[
+            _condition('Failed', 'BackoffLimitExceeded')]), [])
+        self.assertEqual(outcome['status'], 'failed')
+        self.assertEqual(outcome['reason'], 'BackoffLimitExceeded')
+        self.assertEqual(outcome['duration'], 10)
+
+    def test_image_pull(self):
+        outcome = self.runner.outcome(
+            _job('a'), [_pod('a-0', 'a', 'Pending', 'ImagePullBackOff')])
+        self.assertEqual(outcome['status'], 'failed')
+        self.assertEqual(outcome['reason'], 'ImagePullBackOff')
+        self.assertEqual(outcome['pod'], 'a-0')
+
+    def test_running(self):
+        self.assertIsNone(self.runner.outcome(
+            _job('a'), [_pod('a-0', 'a', 'Pending', 'ContainerCreating')]))
+
+    @mock.patch('functest_kubernetes.job.informer.Informer')
+    def test_wait(self, *args):
+        jobs = mock.Mock(cache={
+            'a': _job('a', 1), 'b': _job('b', conditions=[
+                _condition('Failed', 'DeadlineExceeded')])})
+        pods = mock.Mock(cache={'a-0': _pod('a-0', 'a', 'Succeeded')})
+        args[0].return_value.start.side_effect = [jobs, pods]
+        outcomes = self.runner.wait(1)
+        self.assertEqual(outcomes['a']['status'], 'succeeded')
+        self.assertEqual(outcomes['a']['pod'], 'a-0')
+        self.assertEqual(outcomes['b']['reason'], 'DeadlineExceeded')
+        self.assertIsNone(outcomes['b']['pod'])
+        jobs.stop.assert_called_once_with()
+        pods.stop.assert_called_once_with()
+
+    @mock.patch('functest_kubernetes.job.informer.Informer')
+    def test_timeout(self, *args):
+        jobs = mock.Mock(cache={'a': _job('a', 1)})
+        pods = mock.Mock(cache={})
+        args[0].return_value.start.side_effect = [jobs, pods]
+        outcomes = self.runner.wait(0.01)
+        self.assertEqual(outcomes['a']['status'], 'succeeded')
+        self.assertEqual(outcomes['b']['status'], 'timeout')
+
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    unittest.main(verbosity=2)
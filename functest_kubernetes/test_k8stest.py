@@ -10,13 +10,19 @@
 
 """Define the classes required to fully cover k8s."""
 
+import io
+import json
 import logging
 import os
+import shutil
+import signal
+import tempfile
 import unittest
 
 import mock
 from xtesting.core import testcase
 
+from functest_kubernetes import ginkgo
 from functest_kubernetes import k8stest
 
 
@@ -49,15 +55,271 @@ class E2EUnitTesting(unittest.TestCase):
 
     @mock.patch('os.path.exists', return_value=False)
     @mock.patch('os.makedirs')
-    @mock.patch('re.search')
     @mock.patch('six.moves.builtins.open', mock.mock_open())
     @mock.patch('functest_kubernetes.k8stest.os.path.isfile')
     @mock.patch('functest_kubernetes.k8stest.subprocess.Popen')
     def test_run(self, *args):
+        args[0].return_value.__enter__.return_value.stdout = io.BytesIO(
+            b'Ran 2 of 10 Specs in 1.000 seconds\n'
+            b'SUCCESS! -- 2 Passed | 0 Failed | 0 Pending | 8 Skipped\n')
         self.assertEqual(self.k8stesting.run(),
                          testcase.TestCase.EX_OK)
-        for loop in range(3):
+        for loop in range(2):
             args[loop].assert_called()
+        self.assertEqual(self.k8stesting.details['passed'], 2)
+        self.assertEqual(self.k8stesting.details['skipped'], 8)
+        self.assertEqual(self.k8stesting.result, 100)
+
+    @mock.patch('os.path.exists', return_value=False)
+    @mock.patch('os.makedirs')
+    @mock.patch('six.moves.builtins.open', mock.mock_open())
+    @mock.patch('functest_kubernetes.k8stest.os.path.isfile')
+    @mock.patch('functest_kubernetes.k8stest.subprocess.Popen')
+    def test_run_no_summary(self, *args):
+        args[0].return_value.__enter__.return_value.stdout = io.BytesIO(
+            b'panic: runtime error\n')
+        self.assertEqual(self.k8stesting.run(),
+                         testcase.TestCase.EX_RUN_ERROR)
+
+    def test_shard(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as durations:
+            json.dump({'[sig-node] a': 10, '[sig-node] b': 5,
+                       '[sig-node] c [Serial]': 20, '[sig-apps] d': 1},
+                      durations)
+            durations.flush()
+            shards = self.k8stesting.shard(
+                durations=durations.name, shards=2,
+                ginkgo={'focus': r'\[sig-node\]', 'skip': 'Flaky'})
+        suite = r'(?:Kubernetes e2e suite )?'
+        self.assertEqual(shards, [
+            {'focus': rf'^{suite}(?:\[sig-node\] a)$'},
+            {'focus': rf'^{suite}(?:\[sig-node\] b)$'},
+            {'focus': r'\[sig-node\]',
+             'skip': rf'Flaky|^{suite}(?:\[sig-node\] a|\[sig-node\] b)$'}])
+        # ginkgo matches the filters against the suite-prefixed spec text
+        texts = [f'Kubernetes e2e suite {name}' for name in (
+            '[sig-node] a', '[sig-node] b', '[sig-node] c [Serial]')]
+        self.assertEqual(
+            [ginkgo.select(texts, shard['focus'], shard.get('skip'))
+             for shard in shards],
+            [texts[:1], texts[1:2], texts[2:]])
+
+    def test_shard_no_durations(self):
+        self.assertEqual(self.k8stesting.shard(
+            durations='not_file', shards=2), [])
+
+    @staticmethod
+    def _node(cpu='8', memory='32Gi', ready='True', taints=None,
+              unschedulable=None):
+        node = mock.Mock()
+        node.spec.unschedulable = unschedulable
+        node.spec.taints = taints
+        node.status.conditions = [mock.Mock(type='Ready', status=ready)]
+        node.status.allocatable = {'cpu': cpu, 'memory': memory}
+        return node
+
+    @mock.patch('functest_kubernetes.k8stest.config.new_client_from_config')
+    @mock.patch('functest_kubernetes.k8stest.client.CoreV1Api')
+    def test_auto_nodes(self, *args):
+        args[0].return_value.list_node.return_value.items = [
+            self._node(), self._node(), self._node(ready='False'),
+            self._node(unschedulable=True),
+            self._node(taints=[mock.Mock(effect='NoSchedule', key='foo')])]
+        self.assertEqual(self.k8stesting.resolve_nodes(
+            'config', nodes='auto'), 8)
+        self.assertEqual(self.k8stesting.resolve_nodes(
+            'config', 3, nodes='auto'), 2)
+        args[0].return_value.list_node.return_value.items = [
+            self._node(cpu='1500m', memory='4Gi')]
+        self.assertEqual(self.k8stesting.resolve_nodes(
+            'config', nodes='auto'), 1)
+
+    def test_resolve_nodes(self):
+        self.assertEqual(self.k8stesting.resolve_nodes('config'), 1)
+        self.assertEqual(self.k8stesting.resolve_nodes(
+            'config', nodes=10), 10)
+
+    @mock.patch('functest_kubernetes.k8stest.config.new_client_from_config')
+    @mock.patch('functest_kubernetes.k8stest.client.CoreV1Api')
+    def test_auto_nodes_forbidden(self, *args):
+        args[0].return_value.list_node.side_effect = (
+            k8stest.client.rest.ApiException(status=403))
+        self.assertEqual(self.k8stesting.resolve_nodes(
+            'config', nodes='auto'), 10)
+        self.assertEqual(self.k8stesting.resolve_nodes(
+            'config', 2, nodes='auto'), 5)
+
+    @mock.patch('functest_kubernetes.k8stest.E2ETesting.profile_specs')
+    @mock.patch('functest_kubernetes.k8stest.E2ETesting.run_ginkgo')
+    def test_rerun_failed(self, *args):
+        self.k8stesting.res_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.k8stesting.res_dir)
+        with open(os.path.join(self.k8stesting.res_dir, 'results.json'),
+                  'w', encoding='utf-8') as results:
+            json.dump({'passed': 1, 'failed': 1, 'pending': 0,
+                       'skipped': 8, 'specs': {
+                           '[sig-node] a': ['passed', 1.0],
+                           '[sig-node] b': ['failed', 2.0]}}, results)
+        rerun = ginkgo.SpecResults()
+        rerun.add('[sig-node] b', 'passed', 3.0)
+        args[0].return_value = (ginkgo.OutputParser(), rerun)
+        self.assertTrue(self.k8stesting.run_kubetest(
+            rerun_failed=True, ginkgo={'focus': 'sig-node', 'v': 'true'}))
+        focus = args[0].call_args[0][0]['focus']
+        self.assertEqual(args[0].call_args[0][0], {'v': 'true', 'focus': (
+            r'^(?:Kubernetes e2e suite )?(?:\[sig-node\] b)$')})
+        self.assertEqual(ginkgo.select(
+            ['Kubernetes e2e suite [sig-node] a',
+             'Kubernetes e2e suite [sig-node] b'], focus),
+            ['Kubernetes e2e suite [sig-node] b'])
+        self.assertEqual(self.k8stesting.details['passed'], 2)
+        self.assertEqual(self.k8stesting.details['failed'], 0)
+        self.assertEqual(self.k8stesting.details['skipped'], 8)
+        self.assertEqual(self.k8stesting.details['rerun'], 1)
+        self.assertEqual(self.k8stesting.result, 100)
+
+    @mock.patch('functest_kubernetes.k8stest.E2ETesting.cache_key',
+                return_value='key')
+    @mock.patch('functest_kubernetes.k8stest.E2ETesting.run_ginkgo')
+    def test_cache_hit(self, *args):
+        self.k8stesting.res_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.k8stesting.res_dir)
+        entry = os.path.join(self.k8stesting.res_dir, 'cache', 'key')
+        os.makedirs(entry)
+        with open(os.path.join(entry, 'results.json'), 'w',
+                  encoding='utf-8') as results:
+            json.dump({'passed': 1, 'failed': 1, 'pending': 0,
+                       'skipped': 8, 'specs': {
+                           '[sig-node] a': ['passed', 1.0],
+                           '[sig-node] b': ['failed', 2.0]}}, results)
+        self.assertTrue(self.k8stesting.run_kubetest(
+            cache=True,
+            cache_dir=os.path.join(self.k8stesting.res_dir, 'cache')))
+        args[0].assert_not_called()
+        self.assertEqual(self.k8stesting.details['failed'], 1)
+        self.assertEqual(self.k8stesting.result, 50)
+
+    def test_process_results_killed(self):
+        parser = ginkgo.OutputParser()
+        parser.done, parser.failed, parser.stalled = 12, 2, True
+        self.assertFalse(self.k8stesting.process_results(
+            [(parser, ginkgo.SpecResults())]))
+        self.assertEqual(self.k8stesting.details, {
+            'done': 12, 'failed': 2, 'stalled': True})
+
+    def test_store_results(self):
+        self.k8stesting.res_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.k8stesting.res_dir)
+        for path in ('results.json', 'e2e.log', 'junit_01.xml'):
+            with open(os.path.join(self.k8stesting.res_dir, path), 'w',
+                      encoding='utf-8') as file:
+                file.write('{}')
+        results_cache = mock.Mock()
+        self.k8stesting.store_results(results_cache, 'key')
+        self.assertEqual(
+            sorted(os.path.basename(path) for path in
+                   results_cache.put.call_args[0][1]),
+            ['junit_01.xml', 'results.json'])
+
+    @mock.patch('functest_kubernetes.k8stest.E2ETesting.store_results')
+    @mock.patch('functest_kubernetes.k8stest.E2ETesting.profile_specs')
+    @mock.patch('functest_kubernetes.k8stest.E2ETesting.cache_key',
+                return_value='key')
+    @mock.patch('functest_kubernetes.k8stest.E2ETesting.run_ginkgo')
+    def test_cache_store(self, *args):
+        self.k8stesting.res_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.k8stesting.res_dir)
+        specs = ginkgo.SpecResults()
+        specs.add('[sig-node] a', 'passed', 1.0)
+        parser = ginkgo.OutputParser()
+        args[0].return_value = (parser, specs)
+        kwargs = {'cache': True, 'cache_dir': os.path.join(
+            self.k8stesting.res_dir, 'cache')}
+        self.assertTrue(self.k8stesting.run_kubetest(**kwargs))
+        args[3].assert_called_once_with(mock.ANY, 'key')
+        args[3].reset_mock()
+        parser.stalled = True
+        self.assertTrue(self.k8stesting.run_kubetest(**kwargs))
+        self.assertTrue(self.k8stesting.details['stalled'])
+        args[3].assert_not_called()
+
+    @mock.patch('functest_kubernetes.k8stest.E2ETesting.store_results')
+    @mock.patch('functest_kubernetes.k8stest.E2ETesting.cache_key',
+                return_value='key')
+    @mock.patch('functest_kubernetes.k8stest.E2ETesting.run_ginkgo')
+    def test_cache_no_reports(self, *args):
+        self.k8stesting.res_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.k8stesting.res_dir)
+        parser = ginkgo.OutputParser()
+        parser.feed(
+            b'FAIL! -- 1 Passed | 1 Failed | 0 Pending | 8 Skipped\n')
+        args[0].return_value = (parser, ginkgo.SpecResults())
+        self.assertTrue(self.k8stesting.run_kubetest(
+            cache=True,
+            cache_dir=os.path.join(self.k8stesting.res_dir, 'cache')))
+        args[2].assert_not_called()
+
+    @mock.patch('functest_kubernetes.k8stest.E2ETesting.list_specs',
+                return_value=['[sig-node] a', '[sig-node] b [Serial]',
+                              '[sig-node] c', '[sig-apps] d'])
+    def test_dry_run(self, *args):
+        self.k8stesting.res_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.k8stesting.res_dir)
+        with open(os.path.join(self.k8stesting.res_dir, 'durations.json'),
+                  'w', encoding='utf-8') as durations:
+            json.dump({'[sig-node] a': 10, '[sig-node] b [Serial]': 20},
+                      durations)
+        self.assertTrue(self.k8stesting.run_kubetest(
+            dry_run=True, nodes=2, ginkgo={'focus': 'sig-node'}))
+        args[0].assert_called_once()
+        self.assertEqual(self.k8stesting.details, {
+            'selected': 3, 'serial': 1, 'unknown': 1, 'estimated': 32.5})
+
+    @mock.patch('functest_kubernetes.k8stest.ginkgo.parse_reports')
+    @mock.patch('functest_kubernetes.k8stest.subprocess.run')
+    @mock.patch('functest_kubernetes.k8stest.cache.digest',
+                return_value='digest')
+    def test_list_specs_failed(self, *args):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        args[1].return_value = mock.Mock(
+            returncode=1, stdout=b'invalid configuration\n')
+        args[2].return_value = ginkgo.SpecResults()
+        self.assertIsNone(self.k8stesting.list_specs(cache_dir=cache_dir))
+        self.assertFalse(self.k8stesting.run_kubetest(
+            dry_run=True, cache_dir=cache_dir))
+        args[1].return_value.returncode = 0
+        self.assertIsNone(self.k8stesting.list_specs(cache_dir=cache_dir))
+        self.assertEqual(args[1].call_count, 3)
+        specs = ginkgo.SpecResults()
+        specs.add('[sig-node] a', 'passed', 0)
+        args[2].return_value = specs
+        self.assertEqual(
+            self.k8stesting.list_specs(cache_dir=cache_dir), ['[sig-node] a'])
+        self.assertEqual(
+            self.k8stesting.list_specs(cache_dir=cache_dir), ['[sig-node] a'])
+        self.assertEqual(args[1].call_count, 4)
+
+    @mock.patch('functest_kubernetes.k8stest.E2ETesting.diagnose_stall')
+    def test_watch_stall(self, *args):
+        parser = ginkgo.OutputParser()
+        parser.updated = 0
+        process = mock.Mock()
+        stop = mock.Mock()
+        stop.wait.return_value = False
+        self.k8stesting.watch_stall(
+            process, parser, stop, 'config', 'res_dir', stall_timeout=1)
+        args[0].assert_called_once_with(process, parser, 'config', 'res_dir')
+        process.send_signal.assert_called_once_with(signal.SIGINT)
+        process.kill.assert_called_once_with()
+        self.assertTrue(parser.stalled)
+
+    def test_watch_stall_disabled(self):
+        stop = mock.Mock()
+        self.k8stesting.watch_stall(
+            mock.Mock(), ginkgo.OutputParser(), stop, 'config', 'res_dir',
+            stall_timeout=0)
+        stop.wait.assert_not_called()
 
 
 if __name__ == "__main__":
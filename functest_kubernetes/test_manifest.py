@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2020 Orange and others.
+#
+# All rights reserved. This program and the accompanying materials
+# are made available under the terms of the Apache License, Version 2.0
+# which accompanies this distribution, and is available at
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Define the classes required to fully cover manifest."""
+
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from kubernetes import client
+import mock
+
+from functest_kubernetes import manifest
+
+
+class RenderTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'job.yaml')
+        self._write('image: {{ dockerhub_repo }}/busybox\n', 1)
+        self.patcher = mock.patch(
+            'pkg_resources.resource_filename', return_value=self.path)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def _write(self, data, mtime):
+        with open(self.path, 'w', encoding='utf-8') as file:
+            file.write(data)
+        os.utime(self.path, (mtime, mtime))
+
+    def test_render(self):
+        body = manifest.render('job.yaml', dockerhub_repo='docker.io')
+        self.assertEqual(body, {'image': 'docker.io/busybox'})
+        body['image'] = 'modified'
+        self.assertEqual(
+            manifest.render('job.yaml', dockerhub_repo='docker.io'),
+            {'image': 'docker.io/busybox'})
+        self.assertEqual(
+            manifest.render('job.yaml', dockerhub_repo='mirror'),
+            {'image': 'mirror/busybox'})
+
+    def test_memoized(self):
+        loader = mock.Mock(return_value={})
+        manifest.render('job.yaml', loader=loader, dockerhub_repo='a')
+        manifest.render('job.yaml', loader=loader, dockerhub_repo='a')
+        loader.assert_called_once_with('image: a/busybox')
+
+    def test_changed(self):
+        template = manifest.load_template(self.path)
+        self.assertIs(manifest.load_template(self.path), template)
+        self._write('image: {{ dockerhub_repo }}/alpine\n', 2)
+        self.assertIsNot(manifest.load_template(self.path), template)
+        self.assertEqual(
+            manifest.render('job.yaml', dockerhub_repo='docker.io'),
+            {'image': 'docker.io/alpine'})
+
+
+class ApplierTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    def setUp(self):
+        self.applier = manifest.Applier()
+        # pylint: disable=protected-access
+        self.applier._client = mock.Mock()
+        self.bodies = [
+            {'apiVersion': 'apps/v1', 'kind': 'Deployment',
+             'metadata': {'name': 'bono'}},
+            {'apiVersion': 'v1', 'kind': 'Service',
+             'metadata': {'name': 'bono'}}]
+
+    def test_apply(self):
+        self.assertEqual(len(self.applier.apply(self.bodies, 'ims')), 2)
+        self.applier.dynamic_client.resources.get.assert_any_call(
+            api_version='apps/v1', kind='Deployment')
+        self.applier.dynamic_client.server_side_apply.assert_any_call(
+            self.applier.dynamic_client.resources.get.return_value,
+            body=self.bodies[1], namespace='ims',
+            field_manager='functest-kubernetes', force_conflicts=True)
+
+    def test_errors(self):
+        self.applier.dynamic_client.server_side_apply.side_effect = [
+            client.rest.ApiException(status=409, reason='Conflict'),
+            mock.Mock()]
+        with self.assertRaises(client.rest.ApiException) as exc:
+            self.applier.apply(self.bodies, 'ims')
+        self.assertIn('409 Conflict', exc.exception.reason)
+
+    def test_concurrent(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def apply(*_args, **_kwargs):
+            barrier.wait()
+            return mock.Mock()
+
+        self.applier.max_workers = 2
+        self.applier.dynamic_client.server_side_apply.side_effect = apply
+        self.assertEqual(len(self.applier.apply(self.bodies, 'ims')), 2)
+        self.assertFalse(barrier.broken)
+
+    def test_all_errors(self):
+        self.applier.dynamic_client.server_side_apply.side_effect = [
+            client.rest.ApiException(status=409, reason='Conflict'),
+            client.rest.ApiException(status=422, reason='Invalid')]
+        with self.assertRaises(client.rest.ApiException) as exc:
+            self.applier.apply(self.bodies, 'ims')
+        self.assertEqual(exc.exception.reason.splitlines(), sorted(
+            exc.exception.reason.splitlines()))
+        self.assertIn('Deployment bono:', exc.exception.reason)
+        self.assertIn('Service bono:', exc.exception.reason)
+        self.assertEqual(
+            self.applier.dynamic_client.server_side_apply.call_count, 2)
+
+    @mock.patch('kubernetes.dynamic.DynamicClient')
+    @mock.patch('kubernetes.client.ApiClient')
+    def test_dynamic_client(self, *args):
+        applier = manifest.Applier()
+        self.assertIs(applier.dynamic_client, args[1].return_value)
+        self.assertIs(applier.dynamic_client, args[1].return_value)
+        args[1].assert_called_once_with(args[0].return_value)
+
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    unittest.main(verbosity=2)
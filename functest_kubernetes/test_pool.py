@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2020 Orange and others.
+#
+# All rights reserved. This program and the accompanying materials
+# are made available under the terms of the Apache License, Version 2.0
+# which accompanies this distribution, and is available at
+# http://www.apache.org/licenses/LICENSE-2.0
+
+"""Define the classes required to fully cover pool."""
+
+import itertools
+import logging
+import unittest
+
+from kubernetes import client
+import mock
+
+from functest_kubernetes import pool
+
+
+class PoolTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    def setUp(self):
+        self.reaper = mock.Mock()
+        self.pool = pool.Pool(
+            'ims-', {'pod-security.kubernetes.io/enforce': 'baseline'},
+            config_maps=lambda namespace: {'env-vars': {'ZONE': namespace}},
+            reaper=self.reaper)
+        self.pool.size = 1
+        self.pool.corev1 = mock.Mock()
+        names = itertools.count()
+        self.pool.corev1.create_namespace.side_effect = (
+            lambda body: mock.Mock(**{
+                'metadata.name': f'ims-{next(names)}'}))
+
+    def test_acquire(self):
+        self.assertEqual(self.pool.acquire(), 'ims-0')
+        self.pool.close()
+        body = self.pool.corev1.create_namespace.call_args[0][0]
+        self.assertEqual(body.metadata.labels, {
+            'pod-security.kubernetes.io/enforce': 'baseline',
+            pool.POOL_LABEL: 'ims'})
+        self.assertEqual(
+            self.pool.corev1.create_namespaced_config_map.call_count, 2)
+        self.reaper.put.assert_called_once_with('ims-1')
+
+    def test_disabled(self):
+        self.pool.size = 0
+        self.assertEqual(self.pool.acquire(), 'ims-0')
+        self.pool.release('ims-0')
+        self.pool.close()
+        self.pool.corev1.create_namespace.assert_called_once()
+        self.reaper.put.assert_called_once_with('ims-0')
+
+    def test_spare(self):
+        self.assertEqual(self.pool.acquire(), 'ims-0')
+        for thread in self.pool._threads:  # pylint: disable=protected-access
+            thread.join()
+        self.assertEqual(self.pool.acquire(), 'ims-1')
+        self.pool.release('ims-0')
+        self.pool.close()
+        self.assertEqual(self.pool.corev1.create_namespace.call_count, 3)
+        self.assertEqual(self.reaper.put.call_args_list, [
+            mock.call('ims-0'), mock.call('ims-2')])
+
+    def test_config_map_error(self):
+        self.pool.corev1.create_namespaced_config_map.side_effect = (
+            client.rest.ApiException(status=409))
+        with self.assertRaises(client.rest.ApiException):
+            self.pool.acquire()
+        self.reaper.put.assert_called_once_with('ims-0')
+
+
+class ReaperTesting(unittest.TestCase):
+
+    # pylint: disable=missing-docstring
+
+    def setUp(self):
+        self.reaper = pool.Reaper(mock.Mock())
+
+    def test_delete(self):
+        self.reaper.delete('ims-0')
+        self.reaper.corev1.delete_namespace.assert_called_once_with(
+            'ims-0', propagation_policy='Foreground')
+        self.assertIn('ims-0', self.reaper.terminating)
+
+    def test_delete_error(self):
+        self.reaper.corev1.delete_namespace.side_effect = (
+            client.rest.ApiException(status=403))
+        self.reaper.delete('ims-0')
+        self.assertEqual(self.reaper.terminating, {})
+
+    def test_confirm(self):
+        self.reaper.terminating = {'ims-0': 0, 'ims-1': 0}
+        self.reaper.finalize_timeout = float('inf')
+        self.reaper.corev1.read_namespace.side_effect = lambda name: (
+            None if name == 'ims-1' else
+            self._raise(client.rest.ApiException(status=404)))
+        self.reaper.confirm()
+        self.assertEqual(list(self.reaper.terminating), ['ims-1'])
+        self.reaper.finalize_timeout = 0
+        self.reaper.confirm()
+        self.assertEqual(self.reaper.terminating, {})
+
+    def test_put(self):
+        self.reaper.put('ims-0')
+        self.reaper.join()
+        self.reaper.corev1.delete_namespace.assert_called_once_with(
+            'ims-0', propagation_policy='Foreground')
+
+    @staticmethod
+    def _raise(exc):
+        raise exc
+
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    unittest.main(verbosity=2)